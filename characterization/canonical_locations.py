@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+COVID-19 Dataset Canonical Self-Reported Locations
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Groups spellings of the same location over a whole location totals file
+and writes, next to location_totals-<name>.json:
+
+    canonical_locations-<name>.json        {location: canonical location}
+    canonical_location_totals-<name>.json  totals under canonical locations
+    top100canonical-<name>.csv             top 100 canonical locations
+
+Set CANONICAL_LOCATIONS to the mapping to count canonical locations in
+characterization_locations_usa.py.
+INSTRUCTIONS: python canonical_locations.py [totals] [--threshold N]
+"""
+
+# Imports
+import argparse
+import json
+import logging
+import os
+import sys
+
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tweet_tools.aggregators import save_top100, save_totals
+from tweet_tools.canonical import (SIMILARITY, canonical_locations,
+                                   canonical_totals)
+
+# Define directories
+save_dir = '/analysis/results/characterization/usa-tweets/'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('totals', nargs='?',
+                        default=os.path.join(save_dir, 'location_totals-usa.json'),
+                        help='location totals JSON (default: %(default)s)')
+    parser.add_argument('--threshold', type=int, default=SIMILARITY,
+                        help='token sort ratio of equal locations '
+                             '(default: %(default)s)')
+    args = parser.parse_args()
+
+    totals_dir, totals_file = os.path.split(args.totals)
+    name = os.path.splitext(totals_file)[0].replace('location_totals-', '')
+
+    # Create log
+    logging.basicConfig(
+        filename=os.path.join(totals_dir, 'canonical_locations-%s.log' % name),
+        level=logging.DEBUG,
+        format='%(levelname)s\t%(asctime)s\t%(message)s')
+    logging.info('Start Canonical Location Log of %s', args.totals)
+
+    with open(args.totals) as f:
+        totals = json.load(f)
+    canonical = canonical_locations(totals, threshold=args.threshold)
+    logging.info('%d of %d locations mapped to another spelling',
+                 len(canonical), len(totals))
+
+    logging.info('Saving canonical locations')
+    with open(os.path.join(totals_dir, 'canonical_locations-%s.json' % name), 'w') as f:
+        json.dump(canonical, f)
+    merged = canonical_totals(totals, canonical)
+    save_totals(merged, totals_dir, 'canonical_location_totals-%s.json' % name)
+    save_top100(merged, totals_dir, 'top100canonical-%s.csv' % name)
+
+    logging.info('Processing Complete')
+
+
+if __name__ == "__main__":
+    main()
@@ -5,48 +5,22 @@ Megan M. Parsons | meganmp [at] bu [dot] edu
 """
 
 # Imports
-import csv
-import emoji
-import gzip
-import json
 import logging
 import os
-import unidecode
-from collections import OrderedDict
+import sys
+from functools import partial
+
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tweet_tools.aggregators import (LocationTotals, SketchTotals,
+                                     canonical_user_location, tally_mode,
+                                     user_location)
+from tweet_tools.canonical import canonical_file
+from tweet_tools.scan import ScanEngine, default_processes
 
 # Define directories
 root_dir = '/data/usa-tweets/'
 save_dir = '/analysis/results/characterization/usa-tweets/' 
-
-def rank_locations(loc_dict):
-    ''' Return top 100 locations from location dictionary'''
-    loc_dict = OrderedDict(sorted(loc_dict.items(), key=lambda x: x[1], reverse=True))
-    first_n_values = list(loc_dict.items())[:100]
-    return first_n_values
-
-def remove_emoji(loc):
-    return emoji.get_emoji_regexp().sub(r'', loc)
-
-def preprocess_location(loc):
-    # Remove emoji
-    try:
-        loc = remove_emoji(loc)
-    except:
-        pass
-    
-    # Lowercase
-    loc = loc.lower()
-    
-    # Replace accented characters
-    try:
-        loc = unidecode.unidecode(loc)
-    except:
-        pass
-    
-    # Remove extraneous whitespace
-    loc = loc.strip()
-    
-    return loc
             
 
 def main():
@@ -59,60 +33,37 @@ def main():
     logging.info('Start Characterization Log of Final Dataset Locations')
     
     # Initialize variables
-    logging.info('Initialize dictionary')
-    location_totals = dict()  
+    logging.info('Initialize aggregators')
+    # $TALLY_MODE=sketch counts in bounded memory, =both also measures its error
+    mode = tally_mode()
+    # $CANONICAL_LOCATIONS=canonical_locations-usa.json counts each location
+    # under its canonical spelling
+    canonical = canonical_file()
+    if canonical:
+        logging.info('Counting canonical locations from %s', canonical)
+        key = partial(canonical_user_location, canonical_file=canonical)
+    else:
+        key = user_location
+    engine = ScanEngine(root_dir, processes=default_processes())
+    if mode != 'sketch':
+        locations = engine.register(LocationTotals('location_totals-usa.json',
+                                                   'top100locations-usa.csv',
+                                                   canonical))
+    if mode != 'exact':
+        sketch = engine.register(SketchTotals(key,
+                                              'location_sketch-usa.json',
+                                              'top100locations-sketch-usa.csv'))
     
     # Traverse the data
-    for sub_dir, dirs, files in os.walk(root_dir):
-        dirs.sort()
-        files.sort()
-        for date_dir in sorted(dirs):
-            logging.info('Processing %s', date_dir)
-            for file in sorted(os.listdir(os.path.join(root_dir, date_dir))):
-                file_extension = os.path.splitext(file)[1]
-                if file_extension == '.gz':
-                    logging.info('Processing %s', file)
-                    with gzip.open(os.path.join(sub_dir, date_dir, file), 'r') as gzip_file:
-                        
-                        try:
-                            for line in gzip_file:
-                                line = line.rstrip()
-                                if line:
-                                    tweet_content = json.loads(line)
-                                    location = tweet_content['user']['location']
-                                    location = preprocess_location(location)
-                                    
-                                    # Location Frequency
-                                    if location == None or type(location) != str:
-                                        location = 'none'
-                                    if location in location_totals:
-                                        location_totals[location] += 1
-                                    else:
-                                        location_totals[location] = 1
-                                        
-                        except:
-                            continue
-                
-    logging.info('TRAVERSING DATA COMPLETE')
+    engine.run()
+    if mode == 'both':
+        sketch.compare(locations.totals)
 
-    # Save location totals dictionary
-    logging.info('Saving location totals')
-    with open(os.path.join(save_dir, 'location_totals-usa.json'), 'w') as f4:
-        json.dump(location_totals, f4)
-    
-    # Rank top 100 locations
-    logging.info('Ranking top 100 locations')
-    top100locs = rank_locations(location_totals)
-        
-    # Save top 100 locations in csv
-    logging.info('Saving top 100 locations csv')
-    with open(os.path.join(save_dir, 'top100locations-usa.csv'), 'w') as f3:
-        write = csv.writer(f3)
-        write.writerow(top100locs)
+    # Save location totals dictionary and top 100 locations csv
+    engine.save(save_dir)
         
     logging.info('Processing Complete')
 
 
 if __name__ == "__main__":
     main()
-            
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+COVID-19 Dataset Characterization in a Single Pass
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Replaces separate runs of characterization_usa.py,
+characterization_locations_usa.py, tweets-hcq.py (USA dataset) and
+characterization.py, characterization_locations.py, master_hashtag.py
+(original dataset) with one traversal that writes the same outputs.
+INSTRUCTIONS: python characterization_single_pass.py usa|master [-p N]
+"""
+
+# Imports
+import argparse
+import logging
+import os
+import sys
+
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tweet_tools.aggregators import (GeoTotals, GeotagCount, HashtagTotals,
+                                     KeywordFilter, LanguageTotals,
+                                     LocationTotals, MonthlyTotals)
+from tweet_tools.scan import ScanEngine, default_processes
+
+# Define directories
+usa_root_dir = '/data/usa-tweets/'
+usa_save_dir = '/analysis/results/characterization/usa-tweets/'
+hcq_save_dir = '/data/misinformation/'
+master_root_dir = '/data/COVID-19-TweetIDs-master'
+master_save_dir = '/analysis/results/characterization'
+hashtag_save_dir = '/analysis/results/master_hashtags'
+
+
+def usa_aggregators():
+    ''' Return (aggregator, save_dir) pairs for the USA dataset'''
+    return [
+        (MonthlyTotals('monthly_totals-usa.json'), usa_save_dir),
+        (LanguageTotals('language_totals-usa.json'), usa_save_dir),
+        (LocationTotals('location_totals-usa.json',
+                        'top100locations-usa.csv'), usa_save_dir),
+        (KeywordFilter(['hydroxychloroquine'],
+                       os.path.join(hcq_save_dir, 'hcq-tweets.jsonl.gz'),
+                       'location_totals-hcq.json',
+                       'top100locations-hcq.csv'), hcq_save_dir),
+    ]
+
+
+def master_aggregators():
+    ''' Return (aggregator, save_dir) pairs for the original dataset'''
+    return [
+        (MonthlyTotals('monthly_totals-master.json'), master_save_dir),
+        (LanguageTotals('language_totals-master.json'), master_save_dir),
+        # Raw 'geo' totals no longer overwrite location_totals-master.json
+        (GeoTotals('geo_totals-master.json'), master_save_dir),
+        (LocationTotals('location_totals-master.json',
+                        'top100locations-master.csv'), master_save_dir),
+        (HashtagTotals('hashtag_totals-master.json'), hashtag_save_dir),
+        (GeotagCount('geotagged_master.txt'), hashtag_save_dir),
+    ]
+
+
+DATASETS = {
+    'usa': (usa_root_dir, usa_save_dir, usa_aggregators),
+    'master': (master_root_dir, master_save_dir, master_aggregators),
+}
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('dataset', choices=sorted(DATASETS))
+    parser.add_argument('-p', '--processes', type=int,
+                        default=default_processes(),
+                        help='worker processes (default: $NSLOTS or all cores)')
+    args = parser.parse_args()
+    root_dir, log_dir, build_aggregators = DATASETS[args.dataset]
+
+    # Create log
+    logging.basicConfig(
+        filename=os.path.join(log_dir, 'characterization_single_pass.log'),
+        level=logging.DEBUG,
+        format='%(levelname)s\t%(asctime)s\t%(message)s')
+    logging.info('Start Single-Pass Characterization Log (%s)', args.dataset)
+
+    # Register aggregators
+    engine = ScanEngine(root_dir, processes=args.processes)
+    outputs = build_aggregators()
+    for aggregator, save_dir in outputs:
+        engine.register(aggregator)
+
+    # Traverse the data once
+    engine.run()
+
+    # Save every aggregator to its usual location
+    for aggregator, save_dir in outputs:
+        aggregator.save(save_dir)
+
+    logging.info('Processing Complete')
+
+
+if __name__ == "__main__":
+    main()
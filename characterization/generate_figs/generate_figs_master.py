@@ -5,10 +5,8 @@ Megan M. Parsons | meganmp [at] bu [dot] edu
 """
 
 # Imports
-import csv
 import emoji
 import folium
-from geopy.geocoders import Nominatim
 import gzip
 import json
 import logging
@@ -16,13 +14,22 @@ import matplotlib.pyplot as plt
 import os
 import pandas as pd
 import seaborn as sns
+import sys
 import unidecode
 from fuzzywuzzy import fuzz
 from collections import OrderedDict
 
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+from tweet_tools.geocode import GeocodeCache, get_geocoder
+from tweet_tools.ranking import read_ranking
+
 # Define directories
 root_dir = '/characterization/master/'
 save_dir = '/characterization/master/'
+# Geocoding results kept across runs
+geocode_cache = os.path.join(save_dir, 'geocode_cache.sqlite')
 
 
 def open_json(file):
@@ -33,16 +40,7 @@ def open_json(file):
 
 def open_locs_csv(file):
     ''' Convert top 100 locations csv to Python dictionary'''
-    # Intialize Variables
-    loc_dict = dict()
-    # Conversion from csv to dict
-    with open(os.path.join(root_dir, file), 'r') as f:
-        data = csv.reader(f, delimiter=',')
-        for row in data:
-            for i in range(len(row)):
-                tup = eval(row[i])
-                loc_dict.setdefault(tup[0], []).append(tup[1])
-    return loc_dict
+    return dict(read_ranking(os.path.join(root_dir, file)))
 
 
 def main():
@@ -94,17 +92,22 @@ def main():
     master_tweets_map = folium.Map()
 
     # Plot location markers on map
-    geolocator = Nominatim(user_agent='Class_Project')
-    for key in top100locations.keys():
-        try:
-            user_location = geolocator.geocode(key)
-        except:
+    # Geocode through the cache: only locations never looked up before
+    # reach the geocoder ($GEOCODER=carmen works offline)
+    geocoder = get_geocoder('nominatim', user_agent='Class_Project')
+    cache = GeocodeCache(geocode_cache)
+    if geocoder.name == 'nominatim' and os.path.exists('master_location_map_dict.json'):
+        # Nominatim results of runs before the cache existed
+        cache.import_map(geocoder.name, 'master_location_map_dict.json')
+    geocoded = cache.geocode_many(geocoder, top100locations.keys())
+    cache.close()
+    for key, user_location in geocoded.items():
+        if user_location is None:
             continue
-        if user_location:
-            folium.Marker([user_location.latitude, user_location.longitude],
-                          popup=user_location.address).add_to(master_tweets_map)
-            location_map_dict[key] = [[user_location.latitude,
-                                       user_location.longitude], user_location.address]
+        latitude, longitude, address = user_location
+        folium.Marker([latitude, longitude],
+                      popup=address).add_to(master_tweets_map)
+        location_map_dict[key] = [[latitude, longitude], address]
 
     master_tweets_map.save('master_tweets_map.html')
     json.dump(location_map_dict, open("master_location_map_dict.json", 'w'))
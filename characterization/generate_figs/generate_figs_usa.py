@@ -5,10 +5,8 @@ Megan M. Parsons | meganmp [at] bu [dot] edu
 """
 
 # Imports
-import csv
 import emoji
 import folium
-from geopy.geocoders import Nominatim
 import gzip
 import json
 import logging
@@ -16,13 +14,21 @@ import matplotlib.pyplot as plt
 import os
 import pandas as pd
 import seaborn as sns
+import sys
 import unidecode
-from fuzzywuzzy import fuzz
 from collections import OrderedDict
 
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)))))
+from tweet_tools.geocode import GeocodeCache, get_geocoder
+from tweet_tools.ranking import read_ranking
+
 # Define directories
 root_dir = '/characterization/usa-tweets/'
-save_dir = '/characterization/usa-tweets/' 
+save_dir = '/characterization/usa-tweets/'
+# Geocoding results kept across runs
+geocode_cache = os.path.join(save_dir, 'geocode_cache.sqlite')
 
 def open_json(file):
     with open(os.path.join(root_dir, file), 'r') as f:
@@ -31,16 +37,7 @@ def open_json(file):
 
 def open_locs_csv(file):
     ''' Convert top 100 locations csv to Python dictionary'''
-    # Intialize Variables
-    loc_dict = dict()
-    # Conversion from csv to dict
-    with open(os.path.join(root_dir, file), 'r') as f:
-        data = csv.reader(f, delimiter=',')
-        for row in data:
-            for i in range(len(row)):
-                tup = eval(row[i])
-                loc_dict.setdefault(tup[0], []).append(tup[1])
-    return loc_dict
+    return dict(read_ranking(os.path.join(root_dir, file)))
 
 def main():
     
@@ -92,16 +89,22 @@ def main():
     labeled_map = folium.Map(location=[39, -100], zoom_start=4)
     
     # Plot location markers on map
-    geolocator = Nominatim(user_agent='Class_Project')
-    for key in top100locations.keys():
-        try:
-            user_location = geolocator.geocode(key, country_codes='us')
-        except:
+    # Geocode through the cache: only locations never looked up before
+    # reach the geocoder ($GEOCODER=carmen works offline)
+    geocoder = get_geocoder('nominatim', user_agent='Class_Project', country_codes='us')
+    cache = GeocodeCache(geocode_cache)
+    if geocoder.name == 'nominatim-us' and os.path.exists('location_map_dict.json'):
+        # Nominatim results of runs before the cache existed
+        cache.import_map(geocoder.name, 'location_map_dict.json')
+    geocoded = cache.geocode_many(geocoder, top100locations.keys())
+    cache.close()
+    for key, user_location in geocoded.items():
+        if user_location is None:
             continue
-        if user_location:
-            folium.Marker([user_location.latitude, user_location.longitude], popup=user_location.address).add_to(usa_tweets_map)
-            folium.Marker([user_location.latitude, user_location.longitude], popup=key).add_to(labeled_map)
-            location_map_dict[key] = [[user_location.latitude, user_location.longitude], user_location.address]
+        latitude, longitude, address = user_location
+        folium.Marker([latitude, longitude], popup=address).add_to(usa_tweets_map)
+        folium.Marker([latitude, longitude], popup=key).add_to(labeled_map)
+        location_map_dict[key] = [[latitude, longitude], address]
             
             
     usa_tweets_map.save('usa_tweets_map.html')
@@ -110,14 +113,13 @@ def main():
                 
     ###########################################################################
     # Can we associate similar locations based on Levenshtein distance?
-    str1 = 'usa'
-    str2 = 'USA'
-    token_sort_ratio = fuzz.token_sort_ratio(str1, str2)
-    print(token_sort_ratio)
-    
-    for key, value in map_dict.items():
-        for key2, value2 in map_dict.items():
-            print('{}, {}: {}'.format(key, key2, fuzz.token_sort_ratio(key, key2)))
+    # canonical_locations.py groups every location in location_totals-usa.json
+    canonical_file = os.path.join(root_dir, 'canonical_locations-usa.json')
+    if os.path.exists(canonical_file):
+        canonical = open_json('canonical_locations-usa.json')
+        for key in map_dict:
+            if key in canonical:
+                logging.info('{} -> {}'.format(key, canonical[key]))
     
     
     # What if we associate the same identified locations in the top 100 locations
@@ -133,17 +135,6 @@ def main():
     
     consolidated_locs_length = len(consolidated_locs)
     
-    # Save top 100 locations in csv
-    logging.info('Saving top 100 locations csv')
-    with open(os.path.join(save_dir, 'top100locations-usa.csv'), 'w') as f3:
-        write = csv.writer(f3)
-        write.writerow(top100locs)
-
-    # Save location totals dictionary
-    logging.info('Saving location totals')
-    with open(os.path.join(save_dir, 'location_totals-usa.json'), 'w') as f4:
-        json.dump(location_totals, f4)
-        
     logging.info('Processing Complete')
 
 
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Hydroxychloroquine Tweets: Flattening Benchmark
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Times the original read_json + iterrows/.loc build of tweet_df against
+tweet_tools.flatten.flatten_tweets() on raw Tweets rebuilt from the committed
+hcq_tweets_df.pkl sample, and compares both with the sample. read_json reads
+missing in_reply_to_screen_name values as NaN, which the loop's `x == None`
+test counts as replies, so the loop disagrees on is_reply.
+INSTRUCTIONS: python flatten_benchmark.py [repeat]
+"""
+
+# Imports
+import io
+import json
+import math
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tweet_tools.flatten import TWEET_COLUMNS, flatten_tweets
+
+# Define directories
+root_dir = os.path.dirname(os.path.abspath(__file__))
+
+def is_missing(x):
+    try:
+        return x is None or math.isnan(x)
+    except TypeError:
+        return False
+
+
+def raw_tweet(row):
+    ''' Rebuild a raw Tweet object from a tweet_df row'''
+    tweet = {
+        'created_at': row['created_at'].strftime('%a %b %d %H:%M:%S +0000 %Y'),
+        'id': int(row['id']),
+        'id_str': str(row['id']),
+        'full_text': row['tweet_text'],
+        'user': {'id_str': row['user_id'],
+                 'screen_name': row['user_name'],
+                 'followers_count': int(row['user_followers_count']),
+                 'location': row['profile_loc']},
+        'entities': {'hashtags': [{'text': x} for x in row['hashtags']],
+                     'user_mentions': []},
+        'in_reply_to_status_id': None if is_missing(row['in_reply_to_status_id'])
+                                 else int(row['in_reply_to_status_id']),
+        'in_reply_to_user_id': None if is_missing(row['in_reply_to_user_id'])
+                               else int(row['in_reply_to_user_id']),
+        'in_reply_to_screen_name': row['in_reply_to_screen_name'],
+        'geo': None,
+    }
+    if row['has_mentions']:
+        tweet['entities']['user_mentions'].append({
+            'id': int(row['user_mention_id']),
+            'screen_name': row['user_mention_screen_name']})
+    if row['is_retweet']:
+        tweet['retweeted_status'] = {
+            'text': row['tweet_text'],
+            'user': {'id_str': row['retweeted_id'],
+                     'screen_name': row['retweeted_screen_name']}}
+    return tweet
+
+
+def iterrows_flatten(orig_df):
+    ''' Original tweet_df build from keywords-hcq.py'''
+    tweet_df = pd.DataFrame(columns=TWEET_COLUMNS)
+    transfer_cols = ['created_at', 'id', 'in_reply_to_status_id',
+                     'in_reply_to_user_id', 'in_reply_to_screen_name']
+    tweet_df[transfer_cols] = orig_df[transfer_cols]
+    tweet_df['hashtags'] = orig_df['entities'].apply(
+        lambda x: [y['text'] for y in x['hashtags']])
+    tweet_df['is_reply'] = orig_df['in_reply_to_screen_name'].apply(
+        lambda x: False if x == None else True)
+    tweet_df['is_retweet'] = orig_df['retweeted_status'].apply(
+        lambda x: not is_missing(x))
+
+    for index, row in orig_df.iterrows():
+        user = orig_df.loc[index, 'user']
+        tweet_df.loc[index, 'user_id'] = user['id_str']
+        tweet_df.loc[index, 'user_name'] = user['screen_name']
+        tweet_df.loc[index, 'user_followers_count'] = user['followers_count']
+
+        mentions = orig_df.loc[index, 'entities']['user_mentions']
+        if not mentions:
+            tweet_df.loc[index, 'has_mentions'] = False
+        else:
+            tweet_df.loc[index, 'has_mentions'] = True
+            tweet_df.loc[index, 'user_mention_id'] = mentions[0]['id']
+            tweet_df.loc[index, 'user_mention_screen_name'] = mentions[0]['screen_name']
+
+        if not is_missing(orig_df.loc[index, 'retweeted_status']):
+            retweet = row['retweeted_status']
+            tweet_df.loc[index, 'tweet_text'] = retweet['text']
+            tweet_df.loc[index, 'retweeted_id'] = retweet['user']['id_str']
+            tweet_df.loc[index, 'retweeted_screen_name'] = retweet['user']['screen_name']
+        else:
+            tweet_df.loc[index, 'tweet_text'] = row['full_text']
+
+        tweet_df.loc[index, 'is_geo'] = False
+        tweet_df.loc[index, 'geo_coordinates'] = None
+
+        location = user['location']
+        if location == None or type(location) != str:
+            tweet_df.loc[index, 'is_profile_loc'] = False
+            tweet_df.loc[index, 'profile_loc'] = None
+        else:
+            tweet_df.loc[index, 'is_profile_loc'] = True
+            tweet_df.loc[index, 'profile_loc'] = location
+    return tweet_df
+
+
+def same_value(x, y):
+    if is_missing(x) and is_missing(y):
+        return True
+    if isinstance(x, list) or isinstance(y, list):
+        return list(x) == list(y)
+    return x == y
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+
+    # Rebuild raw Tweets from the committed sample
+    sample_df = pd.read_pickle(os.path.join(root_dir, 'hcq_tweets_df.pkl'))
+    lines = '\n'.join(json.dumps(raw_tweet(row))
+                      for index, row in sample_df.iterrows())
+    lines = '\n'.join([lines] * repeat)
+    print('Tweets: {}'.format(len(sample_df) * repeat))
+
+    # Original: read_json then one .loc assignment per cell
+    start = time.perf_counter()
+    orig_df = pd.read_json(io.StringIO(lines), lines=True)
+    loop_df = iterrows_flatten(orig_df)
+    loop_time = time.perf_counter() - start
+    print('iterrows/.loc:  {:.3f} s'.format(loop_time))
+
+    # Batch: json.loads then one pass per column
+    start = time.perf_counter()
+    batch_df = flatten_tweets(json.loads(line) for line in lines.split('\n'))
+    batch_time = time.perf_counter() - start
+    print('flatten_tweets: {:.3f} s ({:.1f}x)'.format(batch_time,
+                                                      loop_time / batch_time))
+
+    # Compare with the loop and with the committed sample, column by column
+    for name, expected_df in (('iterrows/.loc', loop_df),
+                              ('hcq_tweets_df.pkl', sample_df)):
+        mismatches = dict()
+        for column in TWEET_COLUMNS:
+            count = sum(not same_value(x, y) for x, y in
+                        zip(expected_df[column], batch_df[column]))
+            if count:
+                mismatches[column] = count
+        print('Mismatched cells vs {}: {}'.format(name, mismatches or 'none'))
+
+
+if __name__ == "__main__":
+    main()
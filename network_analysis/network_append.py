@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+COVID-19 Twitter Analysis: Incremental Network Update
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Adds every day of the Parquet store not yet in the graph store to the
+interaction network, then rewrites the network summary from the stored
+degrees and components. Days already in the graph store are skipped, so
+only new days are read.
+INSTRUCTIONS: python network_append.py [start] [end] [--store DIR] [--graph DIR]
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime
+
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tweet_tools.graph_store import GraphStore
+from tweet_tools.network_summary import write_summary
+from tweet_tools.scan import parse_date
+from tweet_tools.store import load_tweets, store_days
+
+# Define directories
+store_dir = '/data/usa-tweets-parquet'
+graph_dir = '/analysis/results/network_analysis/graph'
+
+# Columns needed to build the interaction network
+NETWORK_COLUMNS = ['id', 'user_id', 'user_name',
+                   'in_reply_to_user_id', 'in_reply_to_screen_name',
+                   'retweeted_id', 'retweeted_screen_name',
+                   'user_mention_id', 'user_mention_screen_name']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('start', nargs='?', type=parse_date,
+                        help='first day (YYYY-MM-DD)')
+    parser.add_argument('end', nargs='?', type=parse_date,
+                        help='last day (YYYY-MM-DD)')
+    parser.add_argument('--store', default=store_dir,
+                        help='Parquet store directory (default: %(default)s)')
+    parser.add_argument('--graph', default=graph_dir,
+                        help='graph store directory (default: %(default)s)')
+    parser.add_argument('--summary', default='network_analysis-usa.txt',
+                        help='summary report (default: %(default)s)')
+    args = parser.parse_args()
+
+    # Create log
+    logging.basicConfig(
+        filename='network_append.log',
+        level=logging.DEBUG,
+        format='%(levelname)s\t%(asctime)s\t%(message)s')
+
+    graph = GraphStore(args.graph)
+    days = [day for day in store_days(args.store)
+            if (args.start is None or day >= args.start.isoformat())
+            and (args.end is None or day <= args.end.isoformat())
+            and day not in graph.days]
+    logging.info('Appending %d days to %s', len(days), args.graph)
+    start = datetime.now()
+    for day in days:
+        tweet_df = load_tweets(args.store, columns=NETWORK_COLUMNS,
+                               start=day, end=day)
+        graph.append(day, tweet_df)
+
+    write_summary(graph.summary(), args.summary)
+    logging.info('Append Time = %s', datetime.now() - start)
+    logging.info('Network Update Complete')
+
+
+if __name__ == '__main__':
+    main()
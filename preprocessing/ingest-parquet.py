@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+COVID-19 Twitter Analysis: Parquet Ingest
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Flattens every hourly .jsonl.gz shard once into the partitioned Parquet
+store read by the keyword, network and sentiment analyses. Shards already
+in the store are skipped, so new days can be ingested incrementally.
+INSTRUCTIONS: python ingest-parquet.py [start] [end] [--root DIR] [--store DIR]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+from datetime import datetime
+
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tweet_tools.scan import default_processes, parse_date, select_shards
+from tweet_tools.store import ingest_shard
+
+# Define directories
+root_dir = '/data/usa-tweets'
+store_dir = '/data/usa-tweets-parquet'
+
+
+def _ingest(task):
+    (date_dir, day, path), store, overwrite = task
+    return os.path.basename(path), ingest_shard(path, day, store, overwrite)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('start', nargs='?', type=parse_date,
+                        help='first day (YYYY-MM-DD)')
+    parser.add_argument('end', nargs='?', type=parse_date,
+                        help='last day (YYYY-MM-DD)')
+    parser.add_argument('-p', '--processes', type=int,
+                        default=default_processes(),
+                        help='worker processes (default: $NSLOTS or all cores)')
+    parser.add_argument('--root', default=root_dir,
+                        help='tree of .jsonl.gz shards (default: %(default)s)')
+    parser.add_argument('--store', default=store_dir,
+                        help='Parquet store directory (default: %(default)s)')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='rebuild shards already in the store')
+    args = parser.parse_args()
+
+    # Create log
+    logging.basicConfig(
+        filename='ingest-parquet.log',
+        level=logging.DEBUG,
+        format='%(levelname)s\t%(asctime)s\t%(message)s')
+
+    shards = select_shards(args.root, args.start, args.end)
+    logging.info('Ingesting %d shards on %d processes', len(shards),
+                 args.processes)
+    start = datetime.now()
+    with multiprocessing.Pool(args.processes) as pool:
+        tasks = [(shard, args.store, args.overwrite) for shard in shards]
+        for file, rows in pool.imap(_ingest, tasks):
+            if rows is None:
+                logging.info('%s already ingested', file)
+            else:
+                logging.info('%s: %d rows', file, rows)
+    logging.info('Ingest Time = %s', datetime.now() - start)
+    logging.info('Ingest Complete')
+
+
+if __name__ == '__main__':
+    main()
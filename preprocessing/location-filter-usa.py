@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+COVID-19 Twitter Analysis: USA Location Filter
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Replaces location-filter-jan.py ... location-filter-jun.py. Filters the
+English Tweets of a date range down to those Carmen resolves to the United
+States, spreading the hourly shards over a pool of worker processes.
+INSTRUCTIONS: python location-filter-usa.py 2020-01-21 2020-01-31 [-p N]
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import sys
+from datetime import datetime
+
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tweet_tools.resolver import get_location_resolver
+from tweet_tools.scan import (default_processes, iter_lines, parse_date,
+                              select_shards)
+
+# Define directories
+root_dir = '/data/english-tweets'
+save_dir = '/data/usa-tweets'
+totals_dir = '/analysis/preprocessing'
+
+
+def _init_worker():
+    # Load Carmen locations once per worker process
+    get_location_resolver()
+
+
+def filter_shard(shard):
+    ''' Write the USA Tweets of one shard and return its count and time'''
+    date_dir, day, path = shard
+    resolver = get_location_resolver()
+    tweet_num = 0
+    start_4 = datetime.now()
+    out_path = os.path.join(save_dir, date_dir, os.path.basename(path))
+    with gzip.open(out_path, 'w') as file_out:
+        try:
+            for line in iter_lines(path):
+                tweet = json.loads(line)
+                if resolver.country(tweet) == 'United States':
+                    file_out.write(line + b'\n')
+                    tweet_num += 1
+        except (OSError, EOFError, ValueError) as e:
+            logging.warning('Skipping remainder of %s: %s', path, e)
+    time_4 = datetime.now() - start_4
+    return date_dir, day, os.path.basename(path), tweet_num, time_4
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('start', type=parse_date, help='first day (YYYY-MM-DD)')
+    parser.add_argument('end', type=parse_date, help='last day (YYYY-MM-DD)')
+    parser.add_argument('-p', '--processes', type=int,
+                        default=default_processes(),
+                        help='worker processes (default: $NSLOTS or all cores)')
+    parser.add_argument('-o', '--totals',
+                        help='monthly totals JSON (default: %s/<start>_<end>.json)'
+                        % totals_dir)
+    args = parser.parse_args()
+    span = '%s_%s' % (args.start, args.end)
+    totals_file = args.totals or os.path.join(totals_dir, span + '.json')
+
+    # Create log
+    logging.basicConfig(filename='data-%s.log' % span, level=logging.DEBUG,
+                        format='%(levelname)s\t%(asctime)s\t%(message)s')
+
+    # Initialize variables
+    monthly_totals = dict()
+    daily_totals = dict()
+    shards = select_shards(root_dir, args.start, args.end)
+    for date_dir in sorted(set(shard[0] for shard in shards)):
+        os.makedirs(os.path.join(save_dir, date_dir), exist_ok=True)
+
+    # Filter the shards in parallel
+    logging.info('Started: %d shards on %d processes', len(shards),
+                 args.processes)
+    start_1 = datetime.now()
+    with multiprocessing.Pool(args.processes, _init_worker) as pool:
+        # imap keeps shard order, so the totals are merged deterministically
+        for date_dir, day, file, tweet_num, time_4 in pool.imap(filter_shard,
+                                                                shards):
+            logging.info('%s: %d USA Tweets, Time4 = %s', file, tweet_num,
+                         time_4)
+            monthly_totals[date_dir] = monthly_totals.get(date_dir, 0) + tweet_num
+            daily_totals[day] = daily_totals.get(day, 0) + tweet_num
+    time_1 = datetime.now() - start_1
+    logging.info('Time1 = %s', time_1)
+    for day, tweet_num in sorted(daily_totals.items()):
+        logging.info('Daily Total: %s\t%d', day, tweet_num)
+
+    # Save monthly totals dictionary
+    logging.info('Saving monthly totals')
+    with open(totals_file, 'w', encoding='utf-8') as f:
+        json.dump(monthly_totals, f, ensure_ascii=False, indent=4)
+
+    logging.info('Preprocessing Complete')
+
+
+if __name__ == '__main__':
+    main()
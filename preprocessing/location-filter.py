@@ -3,12 +3,15 @@
 
 import gzip
 import json
-import carmen
 import os
 from datetime import datetime
 import sys
 import logging
 
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tweet_tools.resolver import get_location_resolver
+
 
 def main():
     # Define directories
@@ -25,6 +28,9 @@ def main():
     # Initialize variables
     monthly_totals = dict()
 
+    # Load Carmen locations once per process
+    resolver = get_location_resolver()
+
     # Traverse the data
     logging.info('Started')
     start_1 = datetime.now()
@@ -47,18 +53,13 @@ def main():
                                 line = line.rstrip()
                                 if line:
                                     tweet = json.loads(line)
-                                    resolver = carmen.get_resolver()
-                                    resolver.load_locations()
-                                    location = resolver.resolve_tweet(tweet)
-                                    try:
-                                        if location[1].country == 'United States':
-                                            file_out.write(line + b'\n')
-                                            tweet_num += 1
-                                    except BaseException:
-                                        continue
+                                    if resolver.country(tweet) == 'United States':
+                                        file_out.write(line + b'\n')
+                                        tweet_num += 1
                             end_4 = datetime.now()
                             time_4 = end_4 - start_4
                             logging.info('Time4 = %s', time_4)
+                            logging.info('Resolver cache: %s', resolver.cache_info())
             monthly_totals[date_dir] = tweet_num
             end_3 = datetime.now()
             time_3 = end_3 - start_3
@@ -10,9 +10,14 @@ import gzip
 import json
 import logging
 import os
+import sys
 from collections import Counter
 from pprint import pprint as pp
 
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tweet_tools.lazy_json import is_lang
+
 # Define directories
 root_dir = '/data/COVID-19-TweetIDs-master'
 save_dir = '/data/english-tweets'
@@ -48,8 +53,8 @@ def main():
                             for line in gzip_file:
                                 line = line.rstrip()
                                 if line:
-                                    tweet_content = json.loads(line)
-                                    if tweet_content['lang'] == 'en':	# Filter out non-English Tweets
+                                    # Read only the top-level 'lang' field
+                                    if is_lang(line, 'en'):	# Filter out non-English Tweets
                                         file_out.write(line + b'\n')
                                         tweet_num += 1
                     
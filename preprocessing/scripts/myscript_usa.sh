@@ -5,33 +5,31 @@
 
 # Specify hard time limit for the job. 
 #   The job will be aborted if it runs longer than this time.
-#   The default time is 12 hours (6h/day)
+#   The default time is 12 hours
 #$ -l h_rt=72:00:00
 
-# Request 1 core
-#$ -pe omp 1
+# Request 16 cores (one worker process per core)
+#$ -pe omp 16
 
 # Send an email when the job finishes or if it is aborted.
 #$ -m beas
 
 # Give job a name
-#$ -N tweets_feb
+#$ -N tweets_usa
 
 # Combine output and error files into a single file
 #$ -j y
 
 # Specify the output file name
-#$ -o tweets_feb.qlog
-
-# Task Numbers
-#$ -t 1-29
+#$ -o tweets_usa.qlog
 
 # Keep track of information related to the current job
 echo "=========================================================="
 echo "Start date : $(date)"
 echo "Job name : $JOB_NAME"
-echo "Job ID : $JOB_ID  $SGE_TASK_ID"
+echo "Job ID : $JOB_ID"
 echo "=========================================================="
 
+# Usage: qsub myscript_usa.sh 2020-01-21 2020-01-31
 module load python3
-python /analysis/preprocessing/location-filter-feb.py
+python /analysis/preprocessing/location-filter-usa.py $1 $2 -p $NSLOTS
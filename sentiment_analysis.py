@@ -1,24 +1,24 @@
 # General Imports
-import emoji
 import errno
-import gzip
-import json
 import logging
 import matplotlib.pyplot as plt
 import nltk
 import numpy as np
 import os
 import pandas as pd
-import re
 import sys
 from datetime import datetime
-from nltk.corpus import wordnet as wn
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
 from pandas.plotting import register_matplotlib_converters
 
-# Import Google Client Library
-from google.cloud import language
+# Shared tweet_tools package
+from tweet_tools.accumulator import ColumnAccumulator
+from tweet_tools.cleaning import TweetCleaner
+from tweet_tools.flatten import CREATED_AT_FORMAT, tweet_text
+from tweet_tools.interpret import MARKER_COLORS, get_scheme, map_colors
+from tweet_tools.scan import list_shards, read_tweets, shard_day
+from tweet_tools.sentiment import get_backend
+from tweet_tools.sentiment_cache import SentimentCache
+
 # Import COVID-19 Data API
 import COVID19Py
 
@@ -30,9 +30,16 @@ register_matplotlib_converters()
 
 # NLTK Setup
 nltk.download('all')
+# Stopwords, lemmatizer and regexes loaded once for every Tweet
+CLEANER = TweetCleaner()
+
+# Columns of tweet_data and their array typecodes (None: Python objects)
+TWEET_DATA_COLUMNS = {'Date': None,
+                      'ID': None,
+                      'Tweet': None,
+                      'Sentiment_Score': 'd',
+                      'Sentiment_Mag': 'd'}
 
-# Access the Google NLP API
-CLIENT = language.LanguageServiceClient()
 # Access the COVID19Py API
 COVID = COVID19Py.COVID19(
     url='https://covid19-api.kamaropoulos.com')   # Mirror
@@ -51,147 +58,18 @@ def make_datetime_dir(analysis_dir):
     return save_dir
 
 
-def serialize(line):
-    ''' Load, serialize, and preprocess Tweet'''
-    # Decode Binary and Load into Python Dictionary
-    tweet_dict = json.loads(line)
-
-    return tweet_dict
-
-
-def preprocess_tweet(tweet):
-    ''' Return full text of cleaned up tweet '''
-    if 'retweeted_status' in tweet.keys():   # Check if retweet
-        try:
-            tweet = tweet['retweeted_status']['text']
-        except KeyError:
-            tweet = tweet['retweeted_status']['full_text']
-    else:
-        try:
-            tweet = tweet['extended_tweet']['full_text']
-        except KeyError:
-            tweet = tweet['full_text']
-
-    # Clean Tweet
-    tweet = clean_tweet(tweet)
-
-    return tweet
-
-
-def clean_tweet(tweet):
-    ''' Return cleaned up Tweet for Sentiment Analysis'''
-    # Lowercase
-    tweet = tweet.lower()
-
-    # Remove URLs
-    tweet = re.sub(r'https?:\/\/\S+', '', tweet)
-    tweet = re.sub(r'www.[\S]+', '', tweet)
-
-    # Remove usernames
-    tweet = re.sub(r'@[\S_]+', '', tweet)
-
-    # Remove '#' symbol in hashtags
-    tweet = re.sub('#', '', tweet)
-
-    # Remove extraneous whitespace
-    tweet = re.sub('[\t\n\r\f\v]', '', tweet)
-    
-    # Remove emoji
-    tweet = remove_emoji(tweet)
-    
-    # Tokenize tweet
-    tweet = nltk.word_tokenize(tweet)
-    
-    # Remove stopwords
-    stopwords = set(nltk.corpus.stopwords.words("english"))
-    tweet = remove_stopwords(tweet, stopwords)
-    
-    # Identify parts of speech
-    tweet = nltk.pos_tag(tweet)
-
-    # Lemmatize
-    lemmatizer = WordNetLemmatizer() 
-    tweet = lemmatize_tweet(tweet, lemmatizer)
-    
-    # Reconstitute tweet
-    tweet = ' '.join(tweet)
-
-    return tweet
-
-def remove_emoji(tweet):
-    return emoji.get_emoji_regexp().sub(r'', tweet)
-
-def remove_stopwords(tweet, stopwords):
-    filtered_tweet = []
-    for word in tweet:
-        if word not in stopwords:
-            filtered_tweet.append(word)
-    return filtered_tweet
-            
-
-def lemmatize_tweet(tweet, lemmatizer):
-    lemma_tweet = [lemmatizer.lemmatize(word[0], pos=(get_wordnet_pos(word[1]))) for word in tweet]
-    return lemma_tweet
-
-def get_wordnet_pos(treebank_tag):
-    '''Conversion from https://bit.ly/3vQ49de'''
-    if treebank_tag.startswith('J'):
-        return wn.ADJ
-    elif treebank_tag.startswith('V'):
-        return wn.VERB
-    elif treebank_tag.startswith('N'):
-        return wn.NOUN
-    elif treebank_tag.startswith('R'):
-        return wn.ADV
-    else:
-        return wn.NOUN
-
-
-def sentiment_analysis(tweet):
-    ''' Sentiment analysis on input '''
-    document = language.Document(
-        content=tweet,
-        type_=language.Document.Type.PLAIN_TEXT,
-    )
-
-    response = CLIENT.analyze_sentiment(
-        document=document,
-        encoding_type='UTF32',
-    )
-
-    sentiment = response.document_sentiment
-
-    return sentiment
-
-
-def evaluate(score, mag):
-    ''' Sentiment analysis thresholding and interpretation '''
-    # Strongly Positive
-    if score > 0.2 and mag > 2.0:
-        return '++'
-    # Weakly Positive
-    if score > 0.2 and mag < 2.0:
-        return '+'
-    # Neutral
-    if -0.2 <= score <= 0.2 and mag < 2.0:
-        return ' '
-    # Mixed
-    if -0.2 <= score <= 0.2 and mag > 2.0:
-        return 'Mixed'
-    # Weakly Negative
-    if score < -0.2 and mag < 2.0:
-        return '-'
-    # Strongly Negative
-    return '--'
-
-
-def mkr(interp):
-    ''' Assign marker based on interpretation '''
-    if interp == '+' or interp == '++':
-        return 'b'
-    if interp == ' ':
-        return 'k'
-    return 'r'
+def finish_day(tweet_data, day, save_dir, scheme):
+    ''' Interpret and save one day of Tweets; return the columns to plot'''
+    tweet_data['Date'] = pd.to_datetime(
+        tweet_data['Date'], format=CREATED_AT_FORMAT).dt.tz_convert(None)
+    tweet_data['Interpretation'] = scheme(tweet_data['Sentiment_Score'],
+                                          tweet_data['Sentiment_Mag'])
+    tweet_data['Marker Color'] = map_colors(tweet_data['Interpretation'],
+                                            MARKER_COLORS, 'r')
+    tweet_data.to_pickle(os.path.join(save_dir, 'sentiment-%s.pkl' % day))
+    logging.info('Daily Total: %s\t%d', day, len(tweet_data))
+    # Tweet text stays on disk so a month of scores fits in memory
+    return tweet_data.drop(columns='Tweet')
 
 
 def tweet_polarity(tweet_data):
@@ -252,6 +130,7 @@ def main():
     # Define directories
     root_dir = '/data/usa-tweets'
     analysis_dir = '/analysis/results/sentiment_analysis/'
+    sentiment_cache = '/analysis/results/sentiment_cache.sqlite'
     save_dir = make_datetime_dir(analysis_dir)
 
     # Create log
@@ -274,75 +153,67 @@ def main():
 
     # Process Twitter Data
     logging.info('[Twitter Data] Processing')
-    # Create Twitter Dataframe
-    tweet_data = pd.DataFrame()
-
-    # Initialize variables
-    monthly_totals = dict()
 
-    # Day Number as a two-digit string
+    # Day Number as a two-digit string (None processes the whole month)
     #day_numbers = int(os.environ["SGE_TASK_ID"])
     #DN = "%02d" % DN
     DN = 25
 
+    # On-disk sentiment results shared by every run
+    backend = get_backend('google')
+    cache = SentimentCache(sentiment_cache)
+    # Interpretation thresholds matching the backend's scores
+    scheme = get_scheme(backend)
+
+    # Column buffers for the Tweets of the current day
+    day_buffer = ColumnAccumulator(TWEET_DATA_COLUMNS)
+    day_frames = []
+    day = None
+
     loop_start = datetime.now()
-    for sub_dir, dirs, files in os.walk(root_dir):
-        dirs.sort()
-        files.sort()
-        for date_dir in sorted(dirs):
-            if date_dir != DATE:
-                continue
-            logging.info('Processing: %s', date_dir)
-            tweets = []
-            tweet_num = 0
-            for file in sorted(os.listdir(os.path.join(root_dir, date_dir))):
-                file_extension = os.path.splitext(file)[1]
-                if file_extension == '.gz':
-                    day_string = "coronavirus-tweet-id-" + DATE + "-" + str(DN)
-                    if day_string not in file:
-                        continue
-                    with gzip.open(os.path.join(sub_dir, date_dir, file), 'r') as gzip_file:
-                        for line in gzip_file:
-                            line = line.rstrip()
-                            if line:
-                                # Load, serialize, and preprocess line
-                                tweet_obj = serialize(line)
-
-                                # Preprocess json_obj
-                                tweet = preprocess_tweet(tweet_obj)
-                                # if any(keyword in tweet for keyword in (
-                                # 'COVID', 'covid', 'China virus', 'coronavirus')):
-
-                                # To obtain hashtag list:
-                                # hashtags =  tweet_obj['entities']['hashtags'][0]['text']
-
-                                # Sentiment analysis
-                                sentiment = sentiment_analysis(tweet)
-
-                                # Date Time format
-                                date_time_str = str(tweet_obj['created_at'])
-                                date_time = datetime.strftime(
-                                    datetime.strptime(
-                                        date_time_str,
-                                        '%a %b %d %H:%M:%S +0000 %Y'),
-                                    '%Y-%m-%d %H:%M:%S')
-
-                                # Store values
-                                pd_df = pd.DataFrame({'Date': [date_time],
-                                                      'ID': handle,
-                                                      'Tweet': tweet,
-                                                      'Sentiment_Score': [sentiment.score],
-                                                      'Sentiment_Mag': [sentiment.magnitude]})
-                                tweet_data = tweet_data.append(
-                                    pd_df, ignore_index=True)
-
-                        tweet_data['Date'] = pd.to_datetime(
-                            tweet_data['Date'], format='%Y-%m-%d %H:%M:%S')
-                        tweet_data['Interpretation'] = tweet_data.apply(
-                            lambda row: evaluate(row['Sentiment_Score']), axis=1)
-                        tweet_data['Marker Color'] = tweet_data.apply(
-                            lambda row: mkr(row['Interpretation']), axis=1)
+    logging.info('Processing: %s', DATE)
+    for path in list_shards(root_dir, DATE):
+        file_day = shard_day(path)
+        if DN is not None and file_day != '%s-%02d' % (DATE, int(DN)):
+            continue
+        if file_day != day and len(day_buffer):
+            day_frames.append(finish_day(day_buffer.flush(), day, save_dir,
+                                         scheme))
+        day = file_day
+        logging.info('Processing %s', os.path.basename(path))
+
+        # Load and preprocess the Tweets of one shard
+        tweet_objs = read_tweets(path)
+        tweets = CLEANER.clean_many([tweet_text(tweet_obj)
+                                     for tweet_obj in tweet_objs])
+        # if any(keyword in tweet for keyword in (
+        # 'COVID', 'covid', 'China virus', 'coronavirus')):
+
+        # To obtain hashtag list:
+        # hashtags =  tweet_obj['entities']['hashtags'][0]['text']
+
+        # Sentiment analysis of distinct, uncached texts only
+        sentiments = cache.score_many(backend, tweets)
+
+        # Store values
+        day_buffer.extend(
+            Date=[tweet_obj['created_at'] for tweet_obj in tweet_objs],
+            ID=[tweet_obj['user']['screen_name'] for tweet_obj in tweet_objs],
+            Tweet=tweets,
+            Sentiment_Score=[score for score, mag in sentiments],
+            Sentiment_Mag=[np.nan if mag is None else mag
+                           for score, mag in sentiments])
+    if len(day_buffer):
+        day_frames.append(finish_day(day_buffer.flush(), day, save_dir,
+                                     scheme))
+
+    # Build the month frame once from the daily frames
+    if day_frames:
+        tweet_data = pd.concat(day_frames, ignore_index=True)
+    else:
+        tweet_data = ColumnAccumulator(TWEET_DATA_COLUMNS).to_frame()
 
+    cache.close()
     loop_end = datetime.now()
     loop_time = loop_end - loop_start
     logging.info('Loop Completion Time = %s', loop_time)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Tweet Cleaning Tests
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Checks the chunked and parallel cleaners against TweetCleaner.clean().
+Needs the NLTK stopwords, wordnet, punkt and tagger data.
+INSTRUCTIONS: python -m unittest discover tests
+"""
+
+# Imports
+import os
+import sys
+import unittest
+
+import nltk
+
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tweet_tools.cleaning import TweetCleaner, clean_parallel
+
+TEXTS = ['RT @user Hydroxychloroquine is WORKING!!! https://t.co/abc #HCQ 😀',
+         'The cats were running to the stores',
+         'meh',
+         '',
+         'Doctors say the #covid19 trials are failing\nwww.example.com',
+         '@who    Masks   WORK'] * 5
+
+
+def has_nltk_data():
+    for resource in ['corpora/stopwords', 'corpora/wordnet', 'tokenizers/punkt_tab',
+                     'taggers/averaged_perceptron_tagger_eng']:
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            return False
+    return True
+
+
+@unittest.skipUnless(has_nltk_data(), 'NLTK data not installed')
+class TweetCleanerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cleaner = TweetCleaner()
+        cls.expected = [cls.cleaner.clean(text) for text in TEXTS]
+
+    def test_clean_many(self):
+        self.assertEqual(self.cleaner.clean_many(TEXTS), self.expected)
+        # Chunks that do not divide the Tweets evenly
+        self.assertEqual(self.cleaner.clean_many(TEXTS, chunk_size=4),
+                         self.expected)
+
+    def test_clean_parallel_keeps_order(self):
+        self.assertEqual(clean_parallel(TEXTS, processes=2, chunk_size=3),
+                         self.expected)
+        self.assertEqual(clean_parallel(TEXTS[::-1], processes=2, chunk_size=3),
+                         self.expected[::-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
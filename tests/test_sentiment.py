@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Sentiment Backend Tests
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Exercises the asyncio backends against stub_server.py on a local port.
+INSTRUCTIONS: python -m unittest discover tests
+"""
+
+# Imports
+import asyncio
+import os
+import sys
+import threading
+import unittest
+
+# Shared tweet_tools package lives at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tweet_tools.sentiment import AsyncBackend, HttpBackend, StubBackend
+from tweet_tools.stub_server import StubServer
+
+TEXTS = ['great news today', 'this is terrible', 'meh', 'hydroxychloroquine']
+
+
+class LoopBoundBackend(AsyncBackend):
+    ''' Records the event loop of every open(), request() and close()'''
+
+    name = 'loop-bound'
+
+    def __init__(self):
+        super().__init__(rate=1000.0)
+        self.loop = None
+        self.runs = []
+
+    async def open(self):
+        self.loop = asyncio.get_running_loop()
+
+    async def close(self):
+        self.runs.append(self.loop)
+        self.loop = None
+
+    async def request(self, text):
+        if asyncio.get_running_loop() is not self.loop:
+            raise RuntimeError('request on a loop other than open()')
+        return StubBackend().score(text)
+
+
+class StubServerTest(unittest.TestCase):
+    ''' HttpBackend against a StubServer on its own thread'''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+        cls.server = cls.loop.run_until_complete(asyncio.start_server(
+            StubServer(latency=0.0).handle, '127.0.0.1', 0))
+        cls.port = cls.server.sockets[0].getsockname()[1]
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join()
+        cls.server.close()
+        cls.loop.run_until_complete(cls.server.wait_closed())
+        cls.loop.close()
+
+    def test_score_many_twice(self):
+        backend = HttpBackend(url='http://127.0.0.1:%d/sentiment' % self.port,
+                              rate=1000.0)
+        expected = StubBackend().score_many(TEXTS)
+        # Each call runs on a new event loop
+        self.assertEqual(backend.score_many(TEXTS), expected)
+        self.assertEqual(backend.score_many(TEXTS[::-1]), expected[::-1])
+        self.assertEqual(backend.score(TEXTS[0]), expected[0])
+
+
+class AsyncBackendTest(unittest.TestCase):
+
+    def test_open_close_per_run(self):
+        backend = LoopBoundBackend()
+        expected = StubBackend().score_many(TEXTS)
+        self.assertEqual(backend.score_many(TEXTS), expected)
+        self.assertEqual(backend.score_many(TEXTS), expected)
+        self.assertEqual(len(backend.runs), 2)
+        self.assertIsNot(backend.runs[0], backend.runs[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
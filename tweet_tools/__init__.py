@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+"""
+COVID-19 Twitter Analysis: Shared Tweet Processing Tools
+Megan M. Parsons | meganmp [at] bu [dot] edu
+"""
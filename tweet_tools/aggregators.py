@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+Aggregators for the Single-Pass Scan Engine
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Each aggregator writes the same JSON/CSV outputs as the standalone
+characterization script it replaces.
+"""
+
+# Imports
+import gzip
+import json
+import logging
+import os
+from collections import Counter
+
+from tweet_tools.canonical import load_canonical
+from tweet_tools.locations import preprocess_location
+from tweet_tools.ranking import top_k, write_ranking
+from tweet_tools.scan import Aggregator
+from tweet_tools.sketch import CMS_DELTA, CMS_EPSILON, HLL_ERROR, TallySketch
+
+# Exact Counters, bounded-memory sketches, or both (to measure sketch error)
+TALLY_MODES = ('exact', 'sketch', 'both')
+
+
+def save_totals(totals, save_dir, filename):
+    ''' Dump a totals dictionary as JSON'''
+    with open(os.path.join(save_dir, filename), 'w') as f:
+        json.dump(dict(totals), f)
+
+
+def save_top100(totals, save_dir, filename):
+    ''' Rank a totals dictionary and save the top 100 as csv rows'''
+    write_ranking(top_k(totals, 100), os.path.join(save_dir, filename))
+
+
+def user_location(tweet):
+    ''' Return the preprocessed profile location of a Tweet'''
+    return preprocess_location(tweet.get('user', {}).get('location'))
+
+
+def canonical_user_location(tweet, canonical_file):
+    ''' Return the canonical location of a Tweet under a saved mapping'''
+    location = user_location(tweet)
+    return load_canonical(canonical_file).get(location, location)
+
+
+def tweet_geo(tweet):
+    ''' Return the raw 'geo' value of a Tweet, or 'none' if not a string'''
+    geo = tweet.get('geo')
+    if geo is None or type(geo) != str:
+        return 'none'
+    return geo
+
+
+def tally_mode(default='exact'):
+    ''' Return the tally mode named by $TALLY_MODE, else by default'''
+    mode = os.environ.get('TALLY_MODE', default)
+    if mode not in TALLY_MODES:
+        raise ValueError('Unknown tally mode %r (expected one of %s)'
+                         % (mode, ', '.join(TALLY_MODES)))
+    return mode
+
+
+def first_hashtag(tweet):
+    ''' Return the text of the first hashtag in a Tweet (or None)'''
+    try:
+        return tweet['entities']['hashtags'][0]['text']
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+class MonthlyTotals(Aggregator):
+    ''' Number of Tweets per date directory'''
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.totals = dict()
+
+    def update(self, tweet, line):
+        pass
+
+    def merge(self, other):
+        pass
+
+    def end_dir(self, date_dir, tweet_num):
+        self.totals[date_dir] = tweet_num
+
+    def save(self, save_dir):
+        logging.info('Saving monthly totals')
+        with open(os.path.join(save_dir, self.filename), 'w', encoding='utf-8') as f:
+            json.dump(self.totals, f, ensure_ascii=False, indent=4)
+
+
+class LanguageTotals(Aggregator):
+    ''' Tweets per language tag'''
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.totals = Counter()
+
+    def update(self, tweet, line):
+        lang = tweet.get('lang')
+        if lang is None:
+            lang = 'none'
+        self.totals[lang] += 1
+
+    def merge(self, other):
+        self.totals.update(other.totals)
+
+    def save(self, save_dir):
+        logging.info('Saving language totals')
+        save_totals(self.totals, save_dir, self.filename)
+
+
+class LocationTotals(Aggregator):
+    ''' Tweets per preprocessed self-reported profile location
+
+    canonical_file is an optional {location: canonical location} JSON
+    mapping written by canonical_locations.py; locations not in it are
+    counted as they are. Only the path is kept here: the mapping itself is
+    loaded once per process by load_canonical().
+    '''
+
+    def __init__(self, totals_file, top_file=None, canonical_file=None):
+        self.totals_file = totals_file
+        self.top_file = top_file
+        self.canonical_file = canonical_file
+        self.totals = Counter()
+
+    def update(self, tweet, line):
+        if self.canonical_file:
+            self.totals[canonical_user_location(tweet, self.canonical_file)] += 1
+        else:
+            self.totals[user_location(tweet)] += 1
+
+    def merge(self, other):
+        self.totals.update(other.totals)
+
+    def save(self, save_dir):
+        logging.info('Saving location totals')
+        save_totals(self.totals, save_dir, self.totals_file)
+        if self.top_file:
+            logging.info('Saving top 100 locations csv')
+            save_top100(self.totals, save_dir, self.top_file)
+
+
+class GeoTotals(Aggregator):
+    ''' Tweets per raw 'geo' value, as in the original dataset summary'''
+
+    def __init__(self, totals_file, top_file=None):
+        self.totals_file = totals_file
+        self.top_file = top_file
+        self.totals = Counter()
+
+    def update(self, tweet, line):
+        self.totals[tweet_geo(tweet)] += 1
+
+    def merge(self, other):
+        self.totals.update(other.totals)
+
+    def save(self, save_dir):
+        logging.info('Saving location totals')
+        save_totals(self.totals, save_dir, self.totals_file)
+        if self.top_file:
+            logging.info('Saving top 100 locations csv')
+            save_top100(self.totals, save_dir, self.top_file)
+
+
+class HashtagTotals(Aggregator):
+    ''' Tweets per leading hashtag'''
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.totals = Counter()
+
+    def update(self, tweet, line):
+        hashtag = first_hashtag(tweet)
+        if hashtag is not None:
+            self.totals[hashtag] += 1
+
+    def merge(self, other):
+        self.totals.update(other.totals)
+
+    def save(self, save_dir):
+        logging.info('Saving hashtag totals')
+        save_totals(self.totals, save_dir, self.filename)
+
+
+class SketchTotals(Aggregator):
+    ''' Approximate Tweets per key in memory independent of distinct keys
+
+    key is a module-level function (or a functools.partial of one)
+    returning the item of a Tweet (or None to skip it), e.g. user_location
+    or first_hashtag. save() writes the sketch
+    summary as JSON and, with top_file, the top estimates as csv rows.
+    After compare() with the totals of the matching exact aggregator, the
+    observed error is saved too.
+    '''
+
+    def __init__(self, key, filename, top_file=None, error=HLL_ERROR,
+                 epsilon=CMS_EPSILON, delta=CMS_DELTA, top=100):
+        self.key = key
+        self.filename = filename
+        self.top_file = top_file
+        self.top = top
+        self.sketch = TallySketch(error, epsilon, delta, capacity=10 * top)
+        self.observed_error = None
+
+    def update(self, tweet, line):
+        item = self.key(tweet)
+        if item is not None:
+            self.sketch.add(item)
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+
+    def compare(self, totals):
+        ''' Measure the sketch against exact totals of the same scan'''
+        self.observed_error = self.sketch.observed_error(totals, self.top)
+        logging.info('Sketch error (%s): %s', self.filename, self.observed_error)
+
+    def save(self, save_dir):
+        logging.info('Saving sketch totals')
+        summary = self.sketch.summary(self.top)
+        if self.observed_error is not None:
+            summary['observed_error'] = self.observed_error
+        with open(os.path.join(save_dir, self.filename), 'w') as f:
+            json.dump(summary, f, indent=4)
+        if self.top_file:
+            logging.info('Saving top sketch estimates csv')
+            write_ranking(summary['top'], os.path.join(save_dir, self.top_file))
+
+
+class GeotagCount(Aggregator):
+    ''' Number of geotagged Tweets'''
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.count = 0
+
+    def update(self, tweet, line):
+        if tweet.get('geo') is not None:
+            self.count += 1
+
+    def merge(self, other):
+        self.count += other.count
+
+    def save(self, save_dir):
+        logging.info('Saving geotag totals')
+        with open(os.path.join(save_dir, self.filename), 'w') as f:
+            f.write('%d' % self.count)
+
+
+class KeywordFilter(Aggregator):
+    ''' Write Tweets matching any keyword to a gzip file and count their locations
+
+    Keywords are matched against the leading hashtag and, if match_text is
+    set, against the full text of Tweets that have a hashtag. Matching lines are buffered per
+    shard and written out by the parent process when the shard is merged.
+    '''
+
+    def __init__(self, keywords, out_path, totals_file, top_file=None,
+                 match_text=False):
+        self.keywords = keywords
+        self.out_path = out_path
+        self.match_text = match_text
+        self.locations = LocationTotals(totals_file, top_file)
+        self.lines = []
+        self.file_out = None
+
+    def spawn(self):
+        return KeywordFilter(self.keywords, self.out_path,
+                             self.locations.totals_file,
+                             self.locations.top_file, self.match_text)
+
+    def matches(self, tweet):
+        ''' Return True if the Tweet contains one of the keywords'''
+        hashtag = first_hashtag(tweet)
+        if hashtag is None:
+            # As in the original filters, Tweets without hashtags never match
+            return False
+        if any(k in hashtag for k in self.keywords):
+            return True
+        if self.match_text:
+            text = tweet.get('full_text') or ''
+            return any(k in text for k in self.keywords)
+        return False
+
+    def start_dir(self, date_dir):
+        if self.file_out is None:
+            self.file_out = gzip.open(self.out_path, 'w')
+
+    def update(self, tweet, line):
+        if self.matches(tweet):
+            self.lines.append(line)
+            self.locations.update(tweet, line)
+
+    def merge(self, other):
+        for line in other.lines:
+            self.file_out.write(line + b'\n')
+        self.locations.merge(other.locations)
+
+    def close(self):
+        if self.file_out is not None:
+            self.file_out.close()
+            self.file_out = None
+
+    def save(self, save_dir):
+        self.locations.save(save_dir)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Canonical Self-Reported Locations
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+canonical_locations() groups spellings of the same self-reported location
+over a whole location totals vocabulary and maps each to the most tweeted
+spelling of its group:
+
+    1. Locations are reduced to sorted-token keys, the form
+       fuzz.token_sort_ratio() compares; equal keys are merged outright.
+    2. Keys are blocked by the 4-character prefix and suffix of their two
+       rarest tokens, so only keys that share (most of) an unusual word are
+       compared; a typo leaves at least one of the two intact.
+       Oversized blocks are compared in overlapping windows of sorted keys.
+    3. Each block is scored in one rapidfuzz cdist() call; pairs at or
+       above the threshold are joined and groups are connected components.
+
+canonical_totals() applies the mapping to a totals dictionary.
+LocationTotals(canonical_file=...) applies a saved mapping while scanning;
+load_canonical() reads it once per process, so scan workers never copy or
+pickle it with their partial results.
+"""
+
+# Imports
+import json
+import logging
+import os
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from tweet_tools.locations import preprocess_location
+
+# fuzz.token_sort_ratio() score at which two locations are the same place
+SIMILARITY = 90
+# Rarest tokens per location used as blocking keys
+BLOCK_TOKENS = 2
+# Characters of a token in its prefix and suffix blocking keys
+AFFIX = 4
+# Largest block compared all-pairs
+MAX_BLOCK = 2000
+
+TOKEN_SPLIT = re.compile(r'[^a-z0-9]+')
+
+# Mappings read by load_canonical() in this process, by path
+_canonical_maps = dict()
+
+
+def location_key(loc):
+    ''' Return the sorted tokens of a location, as token_sort_ratio sees them'''
+    return ' '.join(sorted(token for token in
+                           TOKEN_SPLIT.split(preprocess_location(loc)) if token))
+
+
+def blocks(keys, max_block=MAX_BLOCK):
+    ''' Yield arrays of indices of keys to compare with each other
+
+    keys must be sorted, so windows over an oversized block hold
+    neighbouring keys.
+    '''
+    tokens = [key.split() for key in keys]
+    frequency = Counter(token for key_tokens in tokens for token in set(key_tokens))
+    members, block_keys = [], []
+    for i, key_tokens in enumerate(tokens):
+        rarest = sorted(set(key_tokens), key=lambda t: (frequency[t], t))
+        for token in rarest[:BLOCK_TOKENS]:
+            for affix in {token[:AFFIX] + '-', '-' + token[-AFFIX:]}:
+                members.append(i)
+                block_keys.append(affix)
+    if not members:
+        return
+    codes, _ = pd.factorize(np.array(block_keys, dtype=object))
+    members = np.array(members)
+    order = np.lexsort((members, codes))
+    members, codes = members[order], codes[order]
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    step = max_block // 2
+    for block in np.split(members, bounds):
+        if len(block) < 2:
+            continue
+        if len(block) <= max_block:
+            yield block
+            continue
+        # Sorted neighbourhood: windows overlap by half
+        for start in range(0, len(block) - step, step):
+            yield block[start:start + max_block]
+
+
+def similar_pairs(keys, threshold=SIMILARITY, max_block=MAX_BLOCK):
+    ''' Return index arrays (i, j) of key pairs scoring at least threshold'''
+    rows, cols = [], []
+    for block in blocks(keys, max_block):
+        block_keys = [keys[i] for i in block]
+        # Keys are already token-sorted, so plain ratio is token_sort_ratio
+        scores = process.cdist(block_keys, block_keys, scorer=fuzz.ratio,
+                               score_cutoff=threshold, dtype=np.uint8,
+                               workers=-1)
+        i, j = np.nonzero(np.triu(scores, 1))
+        rows.append(block[i])
+        cols.append(block[j])
+    if not rows:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def canonical_locations(totals, threshold=SIMILARITY, max_block=MAX_BLOCK):
+    ''' Return {location: canonical location} from a location totals dictionary
+
+    Only locations whose canonical spelling differs from their own are
+    included; the canonical spelling of a group is its most tweeted member.
+    '''
+    counts = pd.Series(totals, dtype=np.int64).sort_index()
+    keys = np.array([location_key(loc) for loc in counts.index], dtype=object)
+    labels, unique_keys = pd.factorize(keys, sort=True)
+    unique_keys = list(unique_keys)
+    rows, cols = similar_pairs(unique_keys, threshold, max_block)
+    n = len(unique_keys)
+    graph = sparse.csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)),
+                              shape=(n, n))
+    _, components = csgraph.connected_components(graph, directed=False)
+    logging.info('Canonical locations: %d locations, %d keys, %d similar pairs, '
+                 '%d groups', len(counts), n, graph.nnz, components.max() + 1
+                 if n else 0)
+
+    group = components[labels].astype(np.int64)
+    # Locations without any token stay as they are
+    empty = keys == ''
+    group[empty] = -1 - np.arange(empty.sum())
+    groups = pd.DataFrame({'group': group, 'count': counts.values},
+                          index=counts.index)
+    leaders = groups.sort_values('count', ascending=False, kind='stable')
+    leaders = leaders[~leaders['group'].duplicated()]
+    leader_of = pd.Series(leaders.index, index=leaders['group'].values)
+    canonical = pd.Series(leader_of.loc[groups['group']].values,
+                          index=groups.index)
+    canonical = canonical[canonical.index != canonical.values]
+    return canonical.to_dict()
+
+
+def canonical_totals(totals, canonical):
+    ''' Return totals re-counted under canonical locations'''
+    merged = Counter()
+    for loc, count in totals.items():
+        merged[canonical.get(loc, loc)] += count
+    return merged
+
+
+def canonical_file(default=None):
+    ''' Return the mapping named by $CANONICAL_LOCATIONS, else default'''
+    path = os.environ.get('CANONICAL_LOCATIONS', default)
+    if path and not os.path.exists(path):
+        raise ValueError('Canonical locations file %r does not exist' % path)
+    return path
+
+
+def load_canonical(path):
+    ''' Return the {location: canonical location} mapping saved at path
+
+    Each mapping is read on first use and shared by everything in the
+    process that asks for it.
+    '''
+    canonical = _canonical_maps.get(path)
+    if canonical is None:
+        with open(path) as f:
+            canonical = json.load(f)
+        _canonical_maps[path] = canonical
+    return canonical
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Tweet Text Cleaning for Sentiment Analysis
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+TweetCleaner loads the stopword list, the WordNet lemmatizer and the emoji
+pattern once and reuses them for every Tweet. URLs, usernames, the '#' of
+hashtags and stray whitespace are removed by a single compiled pattern, and
+lemmas are memoized per (token, part of speech).
+
+clean_many() tags whole chunks of Tweets with nltk.pos_tag_sents(), and
+clean_parallel() fans those chunks out over a pool of worker processes, each
+with its own cleaner and lemma cache.
+"""
+
+# Imports
+import multiprocessing
+import re
+
+import nltk
+from nltk.corpus import wordnet as wn
+from nltk.stem import WordNetLemmatizer
+
+from tweet_tools.locations import EMOJI_RE
+
+# URLs, usernames, '#' symbols and extraneous whitespace, removed in one pass
+STRIP_RE = re.compile(r'https?:\/\/\S+|www.[\S]+|@[\S_]+|#|[\t\n\r\f\v]')
+
+# Tweets tagged per pos_tag_sents() call and per worker task
+CHUNK_SIZE = 1000
+
+# Process-wide cleaner created by get_tweet_cleaner()
+_tweet_cleaner = None
+
+
+def get_wordnet_pos(treebank_tag):
+    '''Conversion from https://bit.ly/3vQ49de'''
+    if treebank_tag.startswith('J'):
+        return wn.ADJ
+    elif treebank_tag.startswith('V'):
+        return wn.VERB
+    elif treebank_tag.startswith('N'):
+        return wn.NOUN
+    elif treebank_tag.startswith('R'):
+        return wn.ADV
+    else:
+        return wn.NOUN
+
+
+class TweetCleaner(object):
+    ''' Lowercase, strip, tokenize, drop stopwords and lemmatize Tweets'''
+
+    def __init__(self):
+        self.stopwords = frozenset(nltk.corpus.stopwords.words('english'))
+        self.lemmatizer = WordNetLemmatizer()
+        self.emoji_re = EMOJI_RE
+        # (word, WordNet POS) -> lemma, shared by every Tweet cleaned here
+        self.lemmas = dict()
+
+    def lemmatize(self, word, pos):
+        ''' Return the lemma of a token for a WordNet part of speech'''
+        key = (word, pos)
+        lemma = self.lemmas.get(key)
+        if lemma is None:
+            lemma = self.lemmatizer.lemmatize(word, pos=pos)
+            self.lemmas[key] = lemma
+        return lemma
+
+    def tokenize(self, tweet):
+        ''' Return the tokens of a Tweet that are not stopwords'''
+        tweet = STRIP_RE.sub('', tweet.lower())
+        tweet = self.emoji_re.sub('', tweet)
+        return [word for word in nltk.word_tokenize(tweet)
+                if word not in self.stopwords]
+
+    def lemmatize_tagged(self, tagged):
+        ''' Join the lemmas of a list of (token, treebank tag) pairs'''
+        return ' '.join(self.lemmatize(word, get_wordnet_pos(tag))
+                        for word, tag in tagged)
+
+    def clean(self, tweet):
+        ''' Return cleaned up Tweet for Sentiment Analysis'''
+        return self.lemmatize_tagged(nltk.pos_tag(self.tokenize(tweet)))
+
+    def clean_many(self, tweets, chunk_size=CHUNK_SIZE):
+        ''' Return the cleaned text of every Tweet in an iterable
+
+        Tokenized Tweets are POS tagged a chunk at a time.
+        '''
+        cleaned = []
+        for chunk in iter_chunks(tweets, chunk_size):
+            tagged = nltk.pos_tag_sents([self.tokenize(tweet) for tweet in chunk])
+            cleaned.extend(self.lemmatize_tagged(x) for x in tagged)
+        return cleaned
+
+
+def iter_chunks(items, chunk_size=CHUNK_SIZE):
+    ''' Yield consecutive lists of up to chunk_size items'''
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def get_tweet_cleaner():
+    ''' Return the cleaner for this process, creating it on first use'''
+    global _tweet_cleaner
+    if _tweet_cleaner is None:
+        _tweet_cleaner = TweetCleaner()
+    return _tweet_cleaner
+
+
+def _clean_chunk(chunk):
+    return get_tweet_cleaner().clean_many(chunk)
+
+
+def clean_parallel(tweets, processes=1, chunk_size=CHUNK_SIZE):
+    ''' Clean Tweets in chunks over a process pool, keeping their order'''
+    if processes <= 1:
+        return get_tweet_cleaner().clean_many(tweets, chunk_size)
+    cleaned = []
+    with multiprocessing.Pool(processes) as pool:
+        for chunk in pool.imap(_clean_chunk, iter_chunks(tweets, chunk_size)):
+            cleaned.extend(chunk)
+    return cleaned
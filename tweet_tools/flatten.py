@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Flattened Tweet Table
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Turns raw Tweet objects into the tweet_df rows used by the keyword, network
+and sentiment analyses.
+"""
+
+# Imports
+import pandas as pd
+
+# Created at format of Twitter API v1.1
+CREATED_AT_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+
+# Columns of tweet_df, in order
+TWEET_COLUMNS = ['created_at', 'id', 'user_id',
+                 'tweet_text', 'hashtags',
+                 'user_followers_count',
+                 'is_reply',
+                 'in_reply_to_status_id',
+                 'in_reply_to_user_id',
+                 'in_reply_to_screen_name',
+                 'is_retweet',
+                 'retweeted_id',
+                 'retweeted_screen_name',
+                 'has_mentions',
+                 'user_mention_id',
+                 'user_mention_screen_name',
+                 'is_geo',
+                 'geo_coordinates',
+                 'is_profile_loc',
+                 'profile_loc',
+                 'user_name']
+
+# Id columns that are missing for some Tweets
+NULLABLE_ID_COLUMNS = ['in_reply_to_status_id',
+                       'in_reply_to_user_id',
+                       'user_mention_id']
+
+
+def preprocess_retweet(rt):
+    ''' Return full text of cleaned up tweet '''
+    try:
+        tweet = rt['text']
+    except KeyError:
+        tweet = rt['full_text']
+    return tweet
+
+
+def tweet_text(tweet):
+    ''' Return the full text of a Tweet (of the original for retweets)'''
+    if 'retweeted_status' in tweet:
+        return preprocess_retweet(tweet['retweeted_status'])
+    try:
+        return tweet['extended_tweet']['full_text']
+    except KeyError:
+        return tweet['full_text']
+
+
+def flatten_tweets(tweets):
+    ''' Return tweet_df for a batch of raw Tweets
+
+    Each column is built in one pass over the parsed records instead of
+    assigning cell by cell with tweet_df.loc[index, ...].
+    '''
+    tweets = list(tweets)
+    users = [tweet['user'] for tweet in tweets]
+    entities = [tweet['entities'] for tweet in tweets]
+    mentions = [x['user_mentions'][0] if x['user_mentions'] else None
+                for x in entities]
+    retweets = [tweet.get('retweeted_status') for tweet in tweets]
+    coordinates = [tweet['geo'].get('coordinates') if tweet.get('geo') else None
+                   for tweet in tweets]
+    locations = [x.get('location') if type(x.get('location')) == str else None
+                 for x in users]
+    columns = {
+        'created_at': pd.to_datetime([tweet['created_at'] for tweet in tweets],
+                                     format=CREATED_AT_FORMAT, utc=True),
+        'id': [tweet['id'] for tweet in tweets],
+        'user_id': [x['id_str'] for x in users],
+        'tweet_text': [tweet_text(tweet) for tweet in tweets],
+        'hashtags': [[y['text'] for y in x['hashtags']] for x in entities],
+        'user_followers_count': [x['followers_count'] for x in users],
+        'is_reply': [tweet.get('in_reply_to_screen_name') is not None
+                     for tweet in tweets],
+        'in_reply_to_status_id': [tweet.get('in_reply_to_status_id')
+                                  for tweet in tweets],
+        'in_reply_to_user_id': [tweet.get('in_reply_to_user_id')
+                                for tweet in tweets],
+        'in_reply_to_screen_name': [tweet.get('in_reply_to_screen_name')
+                                    for tweet in tweets],
+        'is_retweet': [x is not None for x in retweets],
+        'retweeted_id': [x['user']['id_str'] if x else None for x in retweets],
+        'retweeted_screen_name': [x['user']['screen_name'] if x else None
+                                  for x in retweets],
+        'has_mentions': [x is not None for x in mentions],
+        'user_mention_id': [x['id'] if x else None for x in mentions],
+        'user_mention_screen_name': [x['screen_name'] if x else None
+                                     for x in mentions],
+        'is_geo': [x is not None for x in coordinates],
+        'geo_coordinates': coordinates,
+        'is_profile_loc': [x is not None for x in locations],
+        'profile_loc': locations,
+        'user_name': [x['screen_name'] for x in users],
+    }
+    # Nullable ids stay Python ints; a float64 column would round them
+    for column in NULLABLE_ID_COLUMNS:
+        columns[column] = pd.Series(columns[column], dtype=object)
+    return pd.DataFrame(columns, columns=TWEET_COLUMNS)
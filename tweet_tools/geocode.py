@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent Geocoding Cache
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Location strings are geocoded once and kept in SQLite, keyed by the
+geocoder and the query. The cache is consulted before every lookup and
+written through after each one, so an interrupted run keeps its work and a
+re-run needs no network access. Queries that did not resolve are cached
+too.
+
+    nominatim  OpenStreetMap Nominatim through geopy, one request per second
+    carmen     offline gazetteer built on Carmen's location database
+
+Scripts pick one with get_geocoder(); $GEOCODER overrides the script's
+default.
+"""
+
+# Imports
+import json
+import logging
+import os
+import sqlite3
+import time
+
+# Nominatim usage policy: at most one request per second
+NOMINATIM_RATE = 1.0
+# Queries per SELECT (SQLite allows 999 parameters)
+LOOKUP_BATCH = 500
+
+
+class NominatimGeocoder(object):
+    ''' OpenStreetMap Nominatim with at most rate requests per second'''
+
+    def __init__(self, user_agent, country_codes=None, rate=NOMINATIM_RATE):
+        # Optional dependency: only needed when this geocoder is used
+        from geopy.geocoders import Nominatim
+        self.geolocator = Nominatim(user_agent=user_agent)
+        self.country_codes = country_codes
+        # Results differ by country filter, so it is part of the cache name
+        self.name = 'nominatim' + ('-' + country_codes if country_codes else '')
+        self.interval = 1.0 / rate
+        self.last_call = 0.0
+
+    def geocode(self, query):
+        ''' Return (latitude, longitude, address) of a query or None'''
+        wait = self.last_call + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.last_call = time.monotonic()
+        if self.country_codes:
+            location = self.geolocator.geocode(query,
+                                               country_codes=self.country_codes)
+        else:
+            location = self.geolocator.geocode(query)
+        if location is None:
+            return None
+        return location.latitude, location.longitude, location.address
+
+
+class CarmenGazetteer(object):
+    ''' Offline geocoder: Carmen's profile location matching
+
+    Nominatim options are accepted and ignored, so a script can switch to
+    this geocoder through $GEOCODER.
+    '''
+
+    name = 'carmen'
+
+    def __init__(self, user_agent=None, country_codes=None):
+        # Optional dependency: only needed when this geocoder is used
+        from tweet_tools.resolver import get_location_resolver
+        self.resolver = get_location_resolver()
+
+    def geocode(self, query):
+        ''' Return (latitude, longitude, address) of a query or None'''
+        resolved = self.resolver.resolve_tweet({'user': {'location': query}})
+        if resolved is None:
+            return None
+        location = resolved[1]
+        try:
+            latitude, longitude = float(location.latitude), float(location.longitude)
+        except (TypeError, ValueError):
+            return None
+        address = ', '.join(part for part in (location.city, location.county,
+                                              location.state, location.country)
+                            if part)
+        return latitude, longitude, address
+
+
+# Geocoders by name
+GEOCODERS = {
+    'nominatim': NominatimGeocoder,
+    'carmen': CarmenGazetteer,
+}
+
+
+def get_geocoder(default, **kwargs):
+    ''' Create the geocoder named by $GEOCODER, else by default'''
+    name = os.environ.get('GEOCODER', default)
+    try:
+        geocoder = GEOCODERS[name]
+    except KeyError:
+        raise ValueError('Unknown geocoder %r (expected one of %s)'
+                         % (name, ', '.join(sorted(GEOCODERS))))
+    return geocoder(**kwargs)
+
+
+class GeocodeCache(object):
+    ''' (geocoder, query) -> (latitude, longitude, address) table in SQLite'''
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS geocode ('
+            'geocoder TEXT NOT NULL, '
+            'query TEXT NOT NULL, '
+            'latitude REAL, '
+            'longitude REAL, '
+            'address TEXT, '
+            'PRIMARY KEY (geocoder, query)) WITHOUT ROWID')
+        self.connection.commit()
+
+    def lookup(self, geocoder, queries):
+        ''' Return {query: result} cached for a geocoder name
+
+        result is (latitude, longitude, address), or None for queries that
+        did not resolve.
+        '''
+        queries = list(queries)
+        found = dict()
+        for i in range(0, len(queries), LOOKUP_BATCH):
+            batch = queries[i:i + LOOKUP_BATCH]
+            rows = self.connection.execute(
+                'SELECT query, latitude, longitude, address FROM geocode '
+                'WHERE geocoder = ? AND query IN (%s)'
+                % ','.join('?' * len(batch)), [geocoder] + batch)
+            for query, latitude, longitude, address in rows:
+                found[query] = (None if latitude is None
+                                else (latitude, longitude, address))
+        return found
+
+    def store(self, geocoder, query, result):
+        ''' Save the result of one query'''
+        latitude, longitude, address = result or (None, None, None)
+        self.connection.execute(
+            'INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?)',
+            (geocoder, query, latitude, longitude, address))
+        self.connection.commit()
+
+    def import_map(self, geocoder, map_path):
+        ''' Seed the cache from a {query: [[lat, lon], address]} JSON dump'''
+        with open(map_path) as f:
+            location_map = json.load(f)
+        self.connection.executemany(
+            'INSERT OR IGNORE INTO geocode VALUES (?, ?, ?, ?, ?)',
+            [(geocoder, query, latlon[0], latlon[1], address)
+             for query, (latlon, address) in location_map.items()])
+        self.connection.commit()
+        return len(location_map)
+
+    def geocode_many(self, geocoder, queries):
+        ''' Return {query: result} for every query, in order
+
+        Only queries not yet cached for geocoder.name are looked up, and
+        each result is saved as soon as it arrives. Call it ahead of time on
+        every query a script needs to prefetch them in bulk.
+        '''
+        queries = list(dict.fromkeys(queries))
+        results = self.lookup(geocoder.name, queries)
+        misses = [query for query in queries if query not in results]
+        logging.info('Geocode cache (%s): %d queries, %d cached, %d to look up',
+                     geocoder.name, len(queries), len(results), len(misses))
+        for query in misses:
+            try:
+                result = geocoder.geocode(query)
+            except Exception as e:
+                # Not cached, so the query is retried on the next run
+                logging.warning('Geocoding %r failed: %s', query, e)
+                continue
+            self.store(geocoder.name, query, result)
+            results[query] = result
+        return {query: results[query] for query in queries if query in results}
+
+    def close(self):
+        self.connection.close()
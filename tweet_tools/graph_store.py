@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental Interaction Graph Store
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+GraphStore keeps the interaction network of every day ingested so far on
+disk, so a new day of Tweets is added without rebuilding the graph:
+
+    <graph_dir>/nodes.txt     node ids, one per line, in index order
+    <graph_dir>/state.npz     edge keys, node degrees, union-find parents
+                              and the days already ingested
+
+append() interns the new node ids, drops edges already in the graph,
+updates the degree counts and merges components with a vectorized
+union-find step. summary() then gives the same statistics as
+graph_summary() without touching the Tweets again.
+"""
+
+# Imports
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from tweet_tools.network import interaction_edges
+from tweet_tools.network_summary import component_summary
+from tweet_tools.sparse_graph import SparseGraph
+
+
+def _find(parent):
+    ''' Return the root of every node, by pointer jumping'''
+    roots = parent
+    while True:
+        jumped = roots[roots]
+        if np.array_equal(jumped, roots):
+            return roots
+        roots = jumped
+
+
+class GraphStore(object):
+    ''' Interaction graph that grows one day of Tweets at a time'''
+
+    def __init__(self, graph_dir):
+        self.graph_dir = graph_dir
+        os.makedirs(graph_dir, exist_ok=True)
+        self.days = []
+        self.edge_keys = np.array([], dtype=np.int64)
+        self.degrees = np.array([], dtype=np.int64)
+        self.parent = np.array([], dtype=np.int32)
+        self.nodes = []
+        if os.path.exists(self._path('state.npz')):
+            with np.load(self._path('state.npz')) as state:
+                self.edge_keys = state['edge_keys']
+                self.degrees = state['degrees']
+                self.parent = state['parent']
+                self.days = state['days'].tolist()
+        if os.path.exists(self._path('nodes.txt')):
+            with open(self._path('nodes.txt')) as f:
+                self.nodes = f.read().splitlines()
+        if len(self.nodes) > len(self.degrees):
+            # Ids written by an append that never saved its state
+            del self.nodes[len(self.degrees):]
+            with open(self._path('nodes.txt'), 'w') as f:
+                f.writelines(node + '\n' for node in self.nodes)
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+
+    def _path(self, name):
+        return os.path.join(self.graph_dir, name)
+
+    def _intern(self, ids):
+        ''' Return the node index of every id, adding new ids'''
+        codes, uniques = pd.factorize(ids)
+        interned = np.empty(len(uniques), dtype=np.int32)
+        new = []
+        for i, node in enumerate(uniques):
+            index = self.index.get(node)
+            if index is None:
+                index = self.index[node] = len(self.nodes) + len(new)
+                new.append(node)
+            interned[i] = index
+        self.nodes.extend(new)
+        return interned[codes], new
+
+    def append(self, day, tweet_df):
+        ''' Add the interaction edges of one day of Tweets
+
+        Return the number of new edges, or None if day was already added.
+        '''
+        if day in self.days:
+            return None
+        edges = interaction_edges(tweet_df)
+        codes, new_nodes = self._intern(np.concatenate(
+            [edges['source'].values, edges['target'].values]))
+        u, v = codes[:len(edges)], codes[len(edges):]
+        low, high = np.minimum(u, v), np.maximum(u, v)
+        # One int64 key per undirected edge, lower index first
+        keys = np.unique(low.astype(np.int64) << 32 | high)
+        # edge_keys is sorted, so known edges are found by binary search
+        at = np.searchsorted(self.edge_keys, keys)
+        known = at < len(self.edge_keys)
+        known[known] = self.edge_keys[at[known]] == keys[known]
+        keys, at = keys[~known], at[~known]
+        low = (keys >> 32).astype(np.int32)
+        high = (keys & 0xFFFFFFFF).astype(np.int32)
+
+        n = len(self.nodes)
+        # A self-loop adds 2 to the degree of its node, as in networkx
+        self.degrees = np.concatenate([self.degrees,
+                                       np.zeros(n - len(self.degrees),
+                                                dtype=np.int64)])
+        self.degrees += np.bincount(low, minlength=n) + np.bincount(high, minlength=n)
+        self.parent = np.concatenate([self.parent,
+                                      np.arange(len(self.parent), n,
+                                                dtype=np.int32)])
+        if len(keys):
+            self._union(low, high)
+        self.edge_keys = np.insert(self.edge_keys, at, keys)
+        self.days = sorted(self.days + [day])
+        self._save(new_nodes)
+        logging.info('%s: %d new nodes, %d new edges', day, len(new_nodes),
+                     len(keys))
+        return len(keys)
+
+    def _union(self, low, high):
+        ''' Merge the components joined by new edges'''
+        roots = _find(self.parent)
+        a, b = roots[low], roots[high]
+        # Components of the graph whose nodes are the roots being merged
+        touched, pairs = np.unique(np.concatenate([a, b]), return_inverse=True)
+        m = len(touched)
+        merge = sparse.csr_matrix(
+            (np.ones(len(a), dtype=np.int8), (pairs[:len(a)], pairs[len(a):])),
+            shape=(m, m))
+        _, labels = csgraph.connected_components(merge, directed=False)
+        # The smallest root of every merged group becomes its root
+        leader = np.full(labels.max() + 1, np.iinfo(np.int32).max,
+                         dtype=np.int32)
+        np.minimum.at(leader, labels, touched)
+        roots[touched] = leader[labels]
+        self.parent = _find(roots).astype(np.int32)
+
+    def _save(self, new_nodes):
+        # Node ids first: extra ids are ignored until the state catches up
+        with open(self._path('nodes.txt'), 'a') as f:
+            f.writelines(node + '\n' for node in new_nodes)
+        # One replace commits the edges, degrees, components and days
+        tmp_path = self._path('.state.npz')
+        np.savez(tmp_path, edge_keys=self.edge_keys, degrees=self.degrees,
+                 parent=self.parent, days=np.array(self.days, dtype=str))
+        os.replace(tmp_path, self._path('state.npz'))
+
+    def labels(self):
+        ''' Return the component label (0..k-1) of every node'''
+        return np.unique(_find(self.parent), return_inverse=True)[1]
+
+    def summary(self):
+        ''' Return graph_summary() statistics of the stored graph'''
+        return component_summary(self.nodes, self.degrees, self.labels())
+
+    def to_sparse_graph(self):
+        ''' Return the stored graph as a SparseGraph'''
+        return SparseGraph.from_edges(np.array(self.nodes, dtype=object),
+                                      self.edge_keys >> 32,
+                                      self.edge_keys & 0xFFFFFFFF)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Sentiment Interpretation and Color Maps
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Threshold schemes map whole sentiment_score / sentiment_mag columns to
+interpretation categories with one np.select() call, and map_colors() maps those
+categories to plot colors through a per-category lookup table:
+
+    google  score and magnitude (Natural Language API, http, stub backends)
+    vader   compound score only; magnitude is ignored
+"""
+
+# Imports
+import numpy as np
+import pandas as pd
+
+# Interpretation categories, from most negative to most positive
+INTERPRETATIONS = ['--', '-', ' ', 'Mixed', '+', '++']
+
+# Color palettes: interpretation -> color; other values get the default
+MARKER_COLORS = {'++': 'b', '+': 'b', ' ': 'k'}
+NODE_COLORS = {'++': 'g', '+': 'g', 'Mixed': 'y', '-': 'r', '--': 'r'}
+VADER_COLORS = {'++': 'navy', '+': 'skyblue', ' ': 'moccasin',
+                '-': 'lightcoral'}
+
+
+def _categories(conditions, labels, default):
+    ''' Return a Categorical of the first label whose condition holds'''
+    codes = np.select(conditions,
+                      [INTERPRETATIONS.index(label) for label in labels],
+                      -1 if default is None else INTERPRETATIONS.index(default))
+    return pd.Categorical.from_codes(codes, categories=INTERPRETATIONS)
+
+
+class GoogleScheme(object):
+    ''' Score and magnitude thresholds of the Natural Language API'''
+
+    name = 'google'
+
+    def __init__(self, score=0.2, magnitude=2.0):
+        self.score = score
+        self.magnitude = magnitude
+
+    def __call__(self, scores, magnitudes):
+        ''' Return the interpretation of every (score, magnitude) pair'''
+        scores = np.asarray(scores, dtype=float)
+        magnitudes = np.asarray(magnitudes, dtype=float)
+        positive = scores > self.score
+        neutral = (scores >= -self.score) & (scores <= self.score)
+        negative = scores < -self.score
+        strong = magnitudes > self.magnitude
+        weak = magnitudes < self.magnitude
+        # Same order as the original if-chain; anything else is '--'
+        return _categories([positive & strong, positive & weak,
+                            neutral & weak, neutral & strong,
+                            negative & weak],
+                           ['++', '+', ' ', 'Mixed', '-'], '--')
+
+
+class VaderScheme(object):
+    ''' Compound score bands of NLTK VADER'''
+
+    name = 'vader'
+
+    def __init__(self, weak=0.05, strong=0.25):
+        self.weak = weak
+        self.strong = strong
+
+    def __call__(self, scores, magnitudes=None):
+        ''' Return the interpretation of every compound score'''
+        scores = np.asarray(scores, dtype=float)
+        # Missing scores are left uncategorized
+        return _categories([scores > self.strong,
+                            scores > self.weak,
+                            scores >= -self.weak,
+                            scores >= -self.strong,
+                            scores < -self.strong],
+                           ['++', '+', ' ', '-', '--'], None)
+
+
+# Threshold schemes by name
+SCHEMES = {
+    'google': GoogleScheme,
+    'vader': VaderScheme,
+}
+
+
+def get_scheme(backend, **kwargs):
+    ''' Return the threshold scheme for the scores of a sentiment backend'''
+    # VADER has no magnitude; every other backend scores like Google
+    return SCHEMES['vader' if backend.name == 'vader' else 'google'](**kwargs)
+
+
+def map_colors(interpretation, palette, default):
+    ''' Return the palette color of every interpretation'''
+    interpretation = pd.Categorical(interpretation, categories=INTERPRETATIONS)
+    # One entry per category, plus the default for missing values (code -1)
+    lookup = np.array([palette.get(label, default) for label in INTERPRETATIONS]
+                      + [default], dtype=object)
+    return lookup[interpretation.codes]
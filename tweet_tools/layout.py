@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Network Layout and Rendering
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+compute_layout() places every node of a network once; subgraphs reuse the
+positions of their nodes. Layouts are cached on disk, keyed by the graph and
+the layout options, so re-plotting a network costs no layout at all.
+
+    spring  nx.spring_layout(), exact but O(n^2) per iteration
+    mesh    Fruchterman-Reingold with sparse-matrix attraction along edges
+            and particle-mesh repulsion: nodes are binned on a grid and the
+            repulsive field is one FFT convolution, O(n + grid^2 log grid)
+
+draw_network() renders nodes and edges as two matplotlib collections,
+rasterized, so 10^5-10^6 nodes plot in one pass.
+"""
+
+# Imports
+import hashlib
+import logging
+import os
+
+import matplotlib.pyplot as plt
+import networkx as nx
+import numpy as np
+from matplotlib.collections import LineCollection
+
+from tweet_tools.sparse_graph import SparseGraph
+
+DEFAULT_LAYOUT = 'mesh'
+# Force-directed iterations
+ITERATIONS = 50
+# Cells per side of the repulsion grid
+GRID_SIZE = 256
+
+
+def spring_layout(graph, iterations=ITERATIONS, seed=None):
+    ''' Return node positions from nx.spring_layout()'''
+    pos = nx.spring_layout(graph.to_networkx(), iterations=iterations, seed=seed)
+    return np.array([pos[node] for node in graph.nodes]).reshape(-1, 2)
+
+
+def _repulsion(xy, k, grid_size):
+    ''' Return the Fruchterman-Reingold repulsion k^2 / d on every node'''
+    low = xy.min(axis=0)
+    cell = max(np.ptp(xy, axis=0).max(), 1e-9) / (grid_size - 1)
+    cells = np.clip(((xy - low) / cell).astype(np.int64), 0, grid_size - 1)
+    density = np.zeros((grid_size, grid_size))
+    np.add.at(density, (cells[:, 0], cells[:, 1]), 1.0)
+    # Vector kernel k^2 * r / |r|^2 over every offset, zero at the origin
+    offsets = np.arange(-grid_size + 1, grid_size) * cell
+    dx, dy = np.meshgrid(offsets, offsets, indexing='ij')
+    r2 = dx ** 2 + dy ** 2
+    r2[grid_size - 1, grid_size - 1] = np.inf
+    shape = (3 * grid_size - 2, 3 * grid_size - 2)
+    rho = np.fft.rfft2(density, shape)
+    field = []
+    for kernel in (k * k * dx / r2, k * k * dy / r2):
+        full = np.fft.irfft2(rho * np.fft.rfft2(kernel, shape), shape)
+        # Linear convolution, cropped back onto the grid
+        field.append(full[grid_size - 1:2 * grid_size - 1,
+                          grid_size - 1:2 * grid_size - 1])
+    return np.column_stack([field[0][cells[:, 0], cells[:, 1]],
+                            field[1][cells[:, 0], cells[:, 1]]])
+
+
+def mesh_layout(graph, iterations=ITERATIONS, seed=None, grid_size=GRID_SIZE):
+    ''' Return node positions from a sparse force-directed layout'''
+    n = graph.number_of_nodes()
+    xy = np.random.RandomState(seed).rand(n, 2)
+    if n < 2:
+        return xy
+    edges = graph.adjacency.tocoo()
+    upper = edges.row < edges.col
+    rows, cols = edges.row[upper], edges.col[upper]
+    # Same optimal distance and cooling schedule as nx.spring_layout()
+    k = np.sqrt(1.0 / n)
+    t = 0.1
+    dt = t / (iterations + 1)
+    for _ in range(iterations):
+        displacement = _repulsion(xy, k, grid_size)
+        # Attraction d^2 / k along every edge
+        delta = xy[rows] - xy[cols]
+        pull = delta * np.hypot(delta[:, 0], delta[:, 1])[:, None] / k
+        for axis in range(2):
+            displacement[:, axis] += (
+                np.bincount(cols, pull[:, axis], minlength=n)
+                - np.bincount(rows, pull[:, axis], minlength=n))
+        length = np.maximum(np.hypot(displacement[:, 0], displacement[:, 1]), 0.01)
+        xy += displacement * (t / length)[:, None]
+        t -= dt
+    return xy
+
+
+# Layout algorithms by name
+LAYOUTS = {
+    'spring': spring_layout,
+    'mesh': mesh_layout,
+}
+
+
+def layout_key(graph, method, **kwargs):
+    ''' Return the cache key of a layout of a graph'''
+    digest = hashlib.sha1(repr((method, sorted(kwargs.items()))).encode('utf-8'))
+    digest.update('\n'.join(map(str, graph.nodes)).encode('utf-8'))
+    digest.update(graph.adjacency.indptr.tobytes())
+    digest.update(graph.adjacency.indices.tobytes())
+    return digest.hexdigest()
+
+
+def compute_layout(network, method=DEFAULT_LAYOUT, cache_path=None, **kwargs):
+    ''' Return {node: position} for an nx.Graph or a SparseGraph
+
+    With cache_path, a layout saved there for the same graph and options is
+    reused, and a new one is saved.
+    '''
+    graph = (network if isinstance(network, SparseGraph)
+             else SparseGraph.from_networkx(network))
+    key = layout_key(graph, method, **kwargs)
+    if cache_path and os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            if str(cached['key']) == key:
+                logging.info('Layout loaded from %s', cache_path)
+                return dict(zip(graph.nodes, cached['xy']))
+    try:
+        layout = LAYOUTS[method]
+    except KeyError:
+        raise ValueError('Unknown layout %r (expected one of %s)'
+                         % (method, ', '.join(sorted(LAYOUTS))))
+    xy = layout(graph, **kwargs)
+    if cache_path:
+        np.savez(cache_path, key=key, xy=xy)
+        logging.info('Layout saved to %s', cache_path)
+    return dict(zip(graph.nodes, xy))
+
+
+def draw_network(network, pos, filename, node_color='#1f78b4', node_size=20,
+                 figsize=(50, 50), dpi=100):
+    ''' Render an nx.Graph or SparseGraph with precomputed positions
+
+    node_color is one color or one per node, in node order.
+    '''
+    if isinstance(network, SparseGraph):
+        nodes = network.nodes
+        upper = network.adjacency.tocoo()
+        keep = upper.row < upper.col
+        edges = zip(nodes[upper.row[keep]], nodes[upper.col[keep]])
+    else:
+        nodes = list(network)
+        edges = network.edges()
+    xy = np.array([pos[node] for node in nodes]).reshape(-1, 2)
+    segments = np.array([(pos[u], pos[v]) for u, v in edges]).reshape(-1, 2, 2)
+
+    fig, ax = plt.subplots(figsize=figsize)
+    ax.add_collection(LineCollection(segments, colors='k', linewidths=0.3,
+                                     alpha=0.5, zorder=1, rasterized=True))
+    ax.scatter(xy[:, 0], xy[:, 1], c=node_color, s=node_size, zorder=2,
+               rasterized=True)
+    ax.autoscale()
+    ax.set_axis_off()
+    fig.savefig(filename, dpi=dpi)
+    plt.close(fig)
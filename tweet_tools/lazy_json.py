@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy Field Extraction from Raw Tweet JSON
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Pulls top-level scalar fields such as 'lang' out of a raw JSON line without
+decoding the whole nested Tweet. The retweeted/quoted status and the user
+object carry their own 'lang', so the last occurrence of the key is checked
+to sit at the top level: once string contents are removed, the rest of the
+line must close exactly one more bracket than it opens. Anything ambiguous
+falls back to a full json.loads().
+"""
+
+# Imports
+import json
+import re
+
+# JSON string literal (contents may contain escaped quotes)
+STRING_RE = re.compile(rb'"(?:[^"\\]|\\.)*"')
+# "key": null | "key": "value" (value without escapes)
+VALUE_RE = re.compile(rb'"\s*:\s*(?:(null)|"([^"\\]*)")')
+
+
+def _is_top_level(line, pos):
+    ''' Return True if the object member ending at pos is at depth 1'''
+    rest = STRING_RE.sub(b'', line[pos:])
+    return (rest.count(b'{') + rest.count(b'[')
+            - rest.count(b'}') - rest.count(b']')) == -1
+
+
+def top_level_field(line, key):
+    ''' Return the top-level string value of key in a raw JSON line
+
+    Returns None for a null or missing value, like dict.get().
+    '''
+    needle = b'"' + key.encode() + b'"'
+    idx = line.rfind(needle)
+    if idx > 0 and line[idx - 1:idx] != b'\\':
+        match = VALUE_RE.match(line, idx + len(needle) - 1)
+        if match and _is_top_level(line, match.end()):
+            if match.group(1):
+                return None
+            return match.group(2).decode()
+    # Ambiguous: decode the whole Tweet
+    return json.loads(line).get(key)
+
+
+def is_lang(line, lang='en'):
+    ''' Return True if a raw Tweet line has the given top-level language'''
+    return top_level_field(line, 'lang') == lang
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Self-Reported Location Processing
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Profile locations repeat across millions of Tweets, so preprocessed
+locations are memoized by raw string: a repeated location costs one cache
+lookup instead of an emoji regex and a transliteration.
+"""
+
+# Imports
+import re
+from functools import lru_cache
+
+import emoji
+import unidecode
+
+# Location of Tweets without a (string) profile location
+MISSING_LOCATION = 'none'
+# Distinct raw locations kept in the memo
+MEMO_SIZE = 2 ** 20
+
+
+def emoji_regexp():
+    ''' Return a compiled pattern matching any emoji, for every emoji release'''
+    try:
+        return emoji.get_emoji_regexp()
+    except AttributeError:
+        # emoji >= 2.0 dropped get_emoji_regexp(): build the same pattern,
+        # longest emoji first so sequences win over their parts
+        emojis = sorted(emoji.EMOJI_DATA, key=len, reverse=True)
+        return re.compile('|'.join(re.escape(e) for e in emojis))
+
+
+EMOJI_RE = emoji_regexp()
+
+
+def remove_emoji(loc):
+    return EMOJI_RE.sub('', loc)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _preprocess(loc):
+    # Remove emoji, lowercase, replace accented characters and remove
+    # extraneous whitespace
+    return unidecode.unidecode(remove_emoji(loc).lower()).strip()
+
+
+def preprocess_location(loc):
+    ''' Return the normalized form of a raw profile location
+
+    None and other non-string values give MISSING_LOCATION.
+    '''
+    if type(loc) != str:
+        return MISSING_LOCATION
+    return _preprocess(loc)
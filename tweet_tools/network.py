@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Interaction Network Construction
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Reply, retweet and mention edges are derived from whole id and screen name
+columns at once: ids are turned into node ids with str(), as before, and
+pairs with neither an id nor a name are dropped in bulk. build_network()
+loads the edges of one chunk of Tweets at a time with add_edges_from().
+"""
+
+# Imports
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+# (id column, screen name column) of every interaction, in edge order
+INTERACTION_COLUMNS = [('in_reply_to_user_id', 'in_reply_to_screen_name'),
+                       ('retweeted_id', 'retweeted_screen_name'),
+                       ('user_mention_id', 'user_mention_screen_name')]
+# str() of a missing id or name
+MISSING = ['None', 'nan']
+# Tweets turned into edges per add_edges_from() call
+EDGE_CHUNK = 100000
+
+
+def node_ids(column):
+    ''' Return str() of every value of a column as an object array'''
+    # numpy calls str() per value, so None and NaN become 'None' and 'nan'
+    return np.asarray(column, dtype=object).astype(str).astype(object)
+
+
+def interaction_edges(tweet_df):
+    ''' Return the interaction edges of a DataFrame of flattened Tweets
+
+    Columns are source, source_name, target, target_name and tweet_id, with
+    the edges of every Tweet in Tweet order. An interaction repeated within
+    one Tweet (a retweet of the mentioned user, say) is listed once.
+    '''
+    source = node_ids(tweet_df['user_id'])
+    source_name = node_ids(tweet_df['user_name'])
+    tweet_id = tweet_df['id'].values
+    frames = []
+    for id_column, name_column in INTERACTION_COLUMNS:
+        target = node_ids(tweet_df[id_column])
+        target_name = node_ids(tweet_df[name_column])
+        keep = ~(np.isin(target, MISSING) & np.isin(target_name, MISSING))
+        frames.append(pd.DataFrame({'row': np.flatnonzero(keep),
+                                    'source': source[keep],
+                                    'source_name': source_name[keep],
+                                    'target': target[keep],
+                                    'target_name': target_name[keep],
+                                    'tweet_id': tweet_id[keep]}))
+    edges = pd.concat(frames, ignore_index=True)
+    edges = edges.sort_values('row', kind='stable')
+    edges = edges.drop_duplicates(['row', 'target', 'target_name'])
+    return edges.drop(columns='row').reset_index(drop=True)
+
+
+def build_network(tweet_df, network=None, chunk_size=EDGE_CHUNK):
+    ''' Add the interaction edges of tweet_df to a graph and return it
+
+    Edges keep the id of the last Tweet that links them, and nodes the last
+    screen name they appeared with.
+    '''
+    if network is None:
+        network = nx.Graph()
+    for start in range(0, len(tweet_df), chunk_size):
+        edges = interaction_edges(tweet_df.iloc[start:start + chunk_size])
+        network.add_edges_from(zip(edges['source'], edges['target'],
+                                   ({'tweet_id': tweet_id}
+                                    for tweet_id in edges['tweet_id'])))
+        # Source then target of every edge, so later names overwrite earlier
+        nodes = np.column_stack([edges['source'], edges['target']]).ravel()
+        names = np.column_stack([edges['source_name'],
+                                 edges['target_name']]).ravel()
+        nx.set_node_attributes(network, dict(zip(nodes, names)), 'name')
+    return network
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Network Summary Statistics
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+graph_summary() computes the node, edge, degree and component statistics of
+a network and of its largest subgraph from one connected-components run and
+one degree histogram per graph. write_summary() writes them as the usual
+text report and as JSON next to it.
+"""
+
+# Imports
+import json
+import os
+
+import numpy as np
+
+from tweet_tools.sparse_graph import SparseGraph
+
+
+def degree_stats(degrees, components):
+    ''' Return the statistics of a graph from the degrees of its nodes'''
+    histogram = np.bincount(degrees, minlength=1)
+    nodes = len(degrees)
+    total = int(np.dot(histogram, np.arange(len(histogram))))
+    return {
+        'nodes': nodes,
+        # Every edge adds 2 to the degree total, self-loops included
+        'edges': total // 2,
+        'max_degree': len(histogram) - 1,
+        'average_degree': total / nodes if nodes else 0.0,
+        # Smallest of equally frequent degrees, like stats.mode()
+        'most_frequent_degree': int(np.argmax(histogram)),
+        'connected_components': components,
+        'degree_histogram': histogram.tolist(),
+    }
+
+
+def graph_summary(graph, labels=None):
+    ''' Return the statistics of a graph and of its largest subgraph
+
+    graph is a SparseGraph or an nx.Graph; labels are the component labels
+    from graph.connected_components(), if already computed.
+    '''
+    if not isinstance(graph, SparseGraph):
+        graph = SparseGraph.from_networkx(graph)
+    if labels is None:
+        _, labels = graph.connected_components()
+    return component_summary(graph.nodes, graph.degrees(), labels)
+
+
+def component_summary(nodes, degrees, labels):
+    ''' Return the statistics of a graph from node degrees and component labels'''
+    sizes = np.bincount(labels, minlength=1)
+    # Components are closed, so degrees within the largest one are unchanged
+    sub_degrees = degrees[labels == np.argmax(sizes)]
+    top = int(np.argmax(degrees)) if len(degrees) else None
+    return {
+        'network': degree_stats(degrees, len(np.flatnonzero(sizes))),
+        'largest_subgraph': degree_stats(sub_degrees, 1 if len(sub_degrees) else 0),
+        'most_connected_user': (None if top is None
+                                else [nodes[top], int(degrees[top])]),
+    }
+
+
+def write_summary(summary, filename, most_connected=False):
+    ''' Write a graph summary as a text report and as JSON
+
+    The JSON file has the name of the report with a .json extension.
+    '''
+    network = summary['network']
+    subnetwork = summary['largest_subgraph']
+    with open(filename, 'w') as file_out:
+        file_out.write('Nodes = {}\n'.format(network['nodes']))
+        file_out.write('Edges = {}\n'.format(network['edges']))
+        file_out.write('Max Degree = {}\n'.format(network['max_degree']))
+        file_out.write('Average degree = {}\n'.format(network['average_degree']))
+        file_out.write('Most frequent degree = {}\n'.format(
+            network['most_frequent_degree']))
+        file_out.write('# Connected Components = {}\n'.format(
+            network['connected_components']))
+        if most_connected:
+            file_out.write('Most connected user = {}\n'.format(
+                tuple(summary['most_connected_user'] or ())))
+
+        if network['connected_components'] == 1:
+            file_out.write('Network is connected.\n')
+        else:
+            file_out.write('Network not connected.\n')
+
+        file_out.write('\nLargest Subgraph Analysis\n')
+        file_out.write('Nodes = {}\n'.format(subnetwork['nodes']))
+        file_out.write('Edges = {}\n'.format(subnetwork['edges']))
+        file_out.write('Max Degree = {}\n'.format(subnetwork['max_degree']))
+        file_out.write('Average degree = {}\n'.format(subnetwork['average_degree']))
+        file_out.write('Most frequent degree = {}\n'.format(
+            subnetwork['most_frequent_degree']))
+        file_out.write('# Connected Components = {}\n'.format(
+            subnetwork['connected_components']))
+
+    with open(os.path.splitext(filename)[0] + '.json', 'w') as json_out:
+        json.dump(summary, json_out, indent=2)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Ranking of Location, Hashtag and Entity Totals
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+top_k() keeps a heap of k entries while scanning a totals dictionary, so
+ranking costs O(n log k) time and O(k) memory instead of sorting every key.
+Ranked totals are saved as one (name, total) csv row per entry.
+"""
+
+# Imports
+import ast
+import csv
+import heapq
+from operator import itemgetter
+
+# Entries in a top-k ranking
+TOP_K = 100
+
+
+def top_k(totals, k=TOP_K):
+    ''' Return the k (name, total) pairs with the largest totals
+
+    Ties keep the order of totals, as a stable sort would.
+    '''
+    return heapq.nlargest(k, totals.items(), key=itemgetter(1))
+
+
+def rank_locations(loc_dict):
+    ''' Return top 100 locations from location dictionary'''
+    return top_k(loc_dict, 100)
+
+
+def write_ranking(ranked, path):
+    ''' Save (name, total) pairs as csv rows'''
+    with open(path, 'w', newline='') as f:
+        write = csv.writer(f)
+        write.writerows(ranked)
+
+
+def read_ranking(path):
+    ''' Return the (name, total) pairs of a ranking csv
+
+    Rankings saved as a single row of "(name, total)" strings are read too.
+    '''
+    with open(path, 'r', newline='') as f:
+        rows = [row for row in csv.reader(f) if row]
+    if len(rows) == 1 and all(cell.startswith('(') for cell in rows[0]):
+        # Old format: one row of tuple reprs
+        return [tuple(ast.literal_eval(cell)) for cell in rows[0]]
+    return [(name, int(total)) for name, total in rows]
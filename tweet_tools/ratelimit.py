@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Rate-Limited Concurrent Requests
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+AsyncScorer keeps many remote requests in flight at once while a token
+bucket holds the request rate to the quota. Failed requests are retried with
+exponential backoff, so wall-clock time is bounded by the quota rather than
+by round-trip latency.
+"""
+
+# Imports
+import asyncio
+import logging
+import random
+import time
+
+# Requests in flight at once
+CONCURRENCY = 32
+# Attempts after the first one
+RETRIES = 5
+# First backoff delay in seconds, doubled on every retry
+BACKOFF = 1.0
+
+
+class RetryableError(Exception):
+    ''' A request failed in a way worth retrying (throttled, 5xx, ...)'''
+    pass
+
+
+class TokenBucket(object):
+    ''' Allow rate acquisitions per second with bursts of up to capacity'''
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        ''' Wait until a token is available and take it'''
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncScorer(object):
+    ''' Run request(text) coroutines under a rate limit and a concurrency cap
+
+    Create it inside the event loop that will run it.
+    '''
+
+    def __init__(self, request, rate, concurrency=CONCURRENCY,
+                 retries=RETRIES, backoff=BACKOFF):
+        self.request = request
+        self.bucket = TokenBucket(rate)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.retries = retries
+        self.backoff = backoff
+
+    async def score(self, text):
+        ''' Return request(text), retrying retryable failures'''
+        for attempt in range(self.retries + 1):
+            async with self.semaphore:
+                await self.bucket.acquire()
+                try:
+                    return await self.request(text)
+                except (RetryableError, ConnectionError, asyncio.TimeoutError) as e:
+                    if attempt == self.retries:
+                        raise
+                    delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                    logging.warning('Request failed (%s), retry %d in %.1f s',
+                                    e, attempt + 1, delay)
+            # Back off outside the semaphore so other requests keep going
+            await asyncio.sleep(delay)
+
+    async def score_all(self, texts):
+        ''' Return request results for texts, in order'''
+        return await asyncio.gather(*[self.score(text) for text in texts])
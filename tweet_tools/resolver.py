@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Cached Carmen Location Resolver
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Carmen's location database is loaded once per process and resolutions are
+memoized on the only Tweet fields Carmen reads: 'place', 'coordinates' and
+the profile 'user.location' string. Repeated profile locations such as
+'new york, ny' then resolve with a single dictionary lookup.
+"""
+
+# Imports
+import json
+import logging
+from functools import lru_cache
+
+import carmen
+
+# Resolutions kept per process
+CACHE_SIZE = 2 ** 20
+
+# Process-wide resolver created by get_location_resolver()
+_location_resolver = None
+
+
+def resolution_key(tweet):
+    ''' Return a hashable key of the fields Carmen uses to resolve a Tweet'''
+    place = tweet.get('place')
+    if place:
+        place = json.dumps(place, sort_keys=True)
+    coordinates = (tweet.get('coordinates') or {}).get('coordinates')
+    if coordinates:
+        coordinates = tuple(coordinates)
+    location = (tweet.get('user') or {}).get('location')
+    return place, coordinates, location
+
+
+class LocationResolver(object):
+    ''' Carmen resolver with an LRU cache keyed on resolution_key()'''
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        logging.info('Loading Carmen locations')
+        self.resolver = carmen.get_resolver()
+        self.resolver.load_locations()
+        self._resolve_key = lru_cache(maxsize=cache_size)(self._resolve_key)
+
+    def _resolve_key(self, key):
+        place, coordinates, location = key
+        tweet = {'user': {'location': location}}
+        if place:
+            tweet['place'] = json.loads(place)
+        if coordinates:
+            tweet['coordinates'] = {'type': 'Point',
+                                    'coordinates': list(coordinates)}
+        return self.resolver.resolve_tweet(tweet)
+
+    def resolve_tweet(self, tweet):
+        ''' Return Carmen's (provisional, Location) tuple or None'''
+        return self._resolve_key(resolution_key(tweet))
+
+    def country(self, tweet):
+        ''' Return the resolved country name of a Tweet or None'''
+        location = self.resolve_tweet(tweet)
+        if location is None:
+            return None
+        return location[1].country
+
+    def cache_info(self):
+        return self._resolve_key.cache_info()
+
+
+def get_location_resolver():
+    ''' Return the resolver for this process, creating it on first use'''
+    global _location_resolver
+    if _location_resolver is None:
+        _location_resolver = LocationResolver()
+    return _location_resolver
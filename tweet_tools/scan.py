@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Single-Pass Scan Engine for Daily Tweet Shards
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Walks the date directories of a tweet tree once, parses every line once and
+feeds each Tweet to all registered aggregators. Shards can be spread across a
+pool of worker processes; each worker returns partial aggregators which are
+merged back in sorted shard order, so results do not depend on scheduling.
+"""
+
+# Imports
+import copy
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import re
+from datetime import datetime
+
+# coronavirus-tweet-id-YYYY-MM-DD-HH.jsonl.gz
+SHARD_RE = re.compile(r'coronavirus-tweet-id-(\d{4}-\d{2}-\d{2})-\d{2}')
+
+
+def default_processes():
+    ''' Number of worker processes: SGE slots if set, else all cores'''
+    return int(os.environ.get('NSLOTS', os.cpu_count() or 1))
+
+
+def list_date_dirs(root_dir, months=None):
+    ''' Return sorted date directories under root_dir (optionally filtered)'''
+    date_dirs = sorted(d for d in os.listdir(root_dir)
+                       if os.path.isdir(os.path.join(root_dir, d)))
+    if months is not None:
+        date_dirs = [d for d in date_dirs if d in months]
+    return date_dirs
+
+
+def list_shards(root_dir, date_dir):
+    ''' Return sorted paths of the .gz shards in one date directory'''
+    return [os.path.join(root_dir, date_dir, file)
+            for file in sorted(os.listdir(os.path.join(root_dir, date_dir)))
+            if os.path.splitext(file)[1] == '.gz']
+
+
+def iter_shards(root_dir, months=None):
+    ''' Yield (date_dir, path) for every .gz shard in sorted order'''
+    for date_dir in list_date_dirs(root_dir, months):
+        for path in list_shards(root_dir, date_dir):
+            yield date_dir, path
+
+
+def parse_date(date_string):
+    ''' Parse a YYYY-MM-DD day'''
+    return datetime.strptime(date_string, '%Y-%m-%d').date()
+
+
+def shard_day(path):
+    ''' Return the day of a shard from its file name (or None)'''
+    match = SHARD_RE.search(os.path.basename(path))
+    if match is None:
+        return None
+    return match.group(1)
+
+
+def select_shards(root_dir, start=None, end=None):
+    ''' Return (date_dir, day, path) for every shard between start and end'''
+    shards = []
+    for date_dir in list_date_dirs(root_dir):
+        if start and date_dir < start.strftime('%Y-%m'):
+            continue
+        if end and date_dir > end.strftime('%Y-%m'):
+            continue
+        for path in list_shards(root_dir, date_dir):
+            day = shard_day(path)
+            if day is None:
+                continue
+            if (start and parse_date(day) < start) or (end and parse_date(day) > end):
+                continue
+            shards.append((date_dir, day, path))
+    return shards
+
+
+def iter_lines(path):
+    ''' Yield non-empty raw lines from a gzipped JSON Lines shard'''
+    with gzip.open(path, 'r') as gzip_file:
+        for line in gzip_file:
+            line = line.rstrip()
+            if line:
+                yield line
+
+
+def read_tweets(path):
+    ''' Return the parsed Tweets of one shard, stopping at a corrupt line'''
+    tweets = []
+    try:
+        for line in iter_lines(path):
+            tweets.append(json.loads(line))
+    except (OSError, EOFError, ValueError) as e:
+        logging.warning('Skipping remainder of %s: %s', path, e)
+    return tweets
+
+
+class Aggregator(object):
+    ''' Base class for anything fed by ScanEngine
+
+    Subclasses override update(), merge() and save(); the directory hooks
+    are optional. Workers feed Tweets to empty copies made by spawn() and the
+    engine merges those partial results into the registered aggregator.
+    '''
+
+    def spawn(self):
+        ''' Return an empty copy with the same configuration'''
+        return copy.deepcopy(self)
+
+    def start_dir(self, date_dir):
+        ''' Called before the first shard of a date directory'''
+        pass
+
+    def update(self, tweet, line):
+        ''' Called once per parsed Tweet with the raw line it came from'''
+        raise NotImplementedError
+
+    def merge(self, other):
+        ''' Fold the partial results of a spawned copy into this one'''
+        raise NotImplementedError
+
+    def end_dir(self, date_dir, tweet_num):
+        ''' Called after the last shard of a date directory'''
+        pass
+
+    def close(self):
+        ''' Release any open resources once the scan is complete'''
+        pass
+
+    def save(self, save_dir):
+        ''' Write results to save_dir'''
+        raise NotImplementedError
+
+
+def scan_shard(aggregators, path):
+    ''' Feed one shard to the aggregators and return its Tweet count'''
+    tweet_num = 0
+    try:
+        for line in iter_lines(path):
+            tweet = json.loads(line)
+            tweet_num += 1
+            for aggregator in aggregators:
+                aggregator.update(tweet, line)
+    except (OSError, EOFError, ValueError) as e:
+        # Truncated or corrupt shard: keep what was read so far
+        logging.warning('Skipping remainder of %s: %s', path, e)
+    return tweet_num
+
+
+# Empty aggregators handed to each worker process by _init_worker
+_templates = None
+
+
+def _init_worker(templates):
+    global _templates
+    _templates = templates
+
+
+def _scan_partial(path):
+    ''' Worker task: scan one shard into fresh copies of the templates'''
+    partials = [template.spawn() for template in _templates]
+    tweet_num = scan_shard(partials, path)
+    return tweet_num, partials
+
+
+class ScanEngine(object):
+    ''' Feed every Tweet under root_dir to a set of aggregators in one pass
+
+    With processes > 1 the shards are scanned by a multiprocessing pool.
+    '''
+
+    def __init__(self, root_dir, months=None, processes=1):
+        self.root_dir = root_dir
+        self.months = months
+        self.processes = processes
+        self.aggregators = []
+
+    def register(self, aggregator):
+        ''' Add an aggregator to the scan and return it'''
+        self.aggregators.append(aggregator)
+        return aggregator
+
+    def run(self):
+        ''' Traverse the data once'''
+        templates = [aggregator.spawn() for aggregator in self.aggregators]
+        if self.processes > 1:
+            logging.info('Scanning with %d worker processes', self.processes)
+            with multiprocessing.Pool(self.processes, _init_worker,
+                                      (templates,)) as pool:
+                self._traverse(lambda paths: pool.imap(_scan_partial, paths))
+        else:
+            _init_worker(templates)
+            self._traverse(lambda paths: map(_scan_partial, paths))
+        for aggregator in self.aggregators:
+            aggregator.close()
+        logging.info('TRAVERSING DATA COMPLETE')
+
+    def _traverse(self, scan_paths):
+        shards = [(date_dir, list_shards(self.root_dir, date_dir))
+                  for date_dir in list_date_dirs(self.root_dir, self.months)]
+        results = scan_paths([path for _, paths in shards for path in paths])
+        for date_dir, paths in shards:
+            logging.info('Processing %s', date_dir)
+            for aggregator in self.aggregators:
+                aggregator.start_dir(date_dir)
+            tweet_num = 0
+            # Results arrive in shard order, so the reduce is deterministic
+            for path in paths:
+                file_num, partials = next(results)
+                logging.info('Processed %s (%d Tweets)',
+                             os.path.basename(path), file_num)
+                tweet_num += file_num
+                for aggregator, partial in zip(self.aggregators, partials):
+                    aggregator.merge(partial)
+            logging.info('Monthly Total: %s\t%d', date_dir, tweet_num)
+            for aggregator in self.aggregators:
+                aggregator.end_dir(date_dir, tweet_num)
+
+    def save(self, save_dir):
+        ''' Save the results of every aggregator'''
+        for aggregator in self.aggregators:
+            aggregator.save(save_dir)
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+Sentiment Backends
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Every backend scores cleaned Tweets as (score, magnitude) pairs through the
+same score_many(texts) call:
+
+    google        Google Cloud Natural Language API, rate limited (optional)
+    google-async  the same API with many requests in flight (optional)
+    http          JSON scoring service, e.g. stub_server.py for tests
+    vader         NLTK VADER compound score over a process pool (no magnitude)
+    stub          deterministic pseudo-scores for offline runs and tests
+
+Scripts pick one with get_backend(); $SENTIMENT_BACKEND overrides the
+script's default so the same pipeline can run on an offline node.
+"""
+
+# Imports
+import asyncio
+import collections
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import time
+from urllib.parse import urlsplit
+
+from tweet_tools.cleaning import CHUNK_SIZE, iter_chunks
+from tweet_tools.ratelimit import CONCURRENCY, AsyncScorer, RetryableError
+from tweet_tools.scan import default_processes
+
+# Default Natural Language API quota: 600 requests per minute
+GOOGLE_RATE = 10.0
+# Texts queued ahead of the oldest unanswered request
+CHECKPOINT_EVERY = 1000
+# Scoring service used by HttpBackend unless $SENTIMENT_URL is set
+SENTIMENT_URL = 'http://127.0.0.1:8080/sentiment'
+
+# Process-wide VADER analyzer created by _vader()
+_analyzer = None
+
+
+class SentimentBackend(object):
+    ''' Base class: subclasses set name and override score()'''
+
+    name = None
+
+    def score(self, text):
+        ''' Return (score, magnitude) of one cleaned text'''
+        raise NotImplementedError
+
+    def iter_scores(self, texts):
+        ''' Yield (score, magnitude) for every text, in order'''
+        for text in texts:
+            yield self.score(text)
+
+    def score_many(self, texts):
+        ''' Return (score, magnitude) for every text, in order'''
+        return list(self.iter_scores(texts))
+
+
+class StubBackend(SentimentBackend):
+    ''' Offline backend: scores derived from a hash of the text'''
+
+    name = 'stub'
+
+    def score(self, text):
+        digest = hashlib.sha1(text.encode('utf-8')).digest()
+        # score in [-1, 1], magnitude in [0, 4)
+        return round(digest[0] / 127.5 - 1, 3), round(digest[1] / 64.0, 3)
+
+
+def _vader():
+    global _analyzer
+    if _analyzer is None:
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+def _vader_chunk(chunk):
+    analyzer = _vader()
+    return [(analyzer.polarity_scores(text)['compound'], None)
+            for text in chunk]
+
+
+class VaderBackend(SentimentBackend):
+    ''' NLTK VADER compound score, spread over a pool of processes'''
+
+    name = 'vader'
+
+    def __init__(self, processes=None, chunk_size=CHUNK_SIZE):
+        self.processes = processes or default_processes()
+        self.chunk_size = chunk_size
+
+    def score(self, text):
+        return _vader_chunk([text])[0]
+
+    def iter_scores(self, texts):
+        chunks = iter_chunks(texts, self.chunk_size)
+        if self.processes <= 1:
+            for chunk in chunks:
+                yield from _vader_chunk(chunk)
+            return
+        with multiprocessing.Pool(self.processes) as pool:
+            for scores in pool.imap(_vader_chunk, chunks):
+                yield from scores
+
+
+class GoogleBackend(SentimentBackend):
+    ''' Google Cloud Natural Language API with at most rate calls per second
+
+    The API scores one document per request, so a batch is a paced
+    sequence of requests rather than one call.
+    '''
+
+    name = 'google'
+
+    def __init__(self, rate=GOOGLE_RATE):
+        # Optional dependency: only needed when this backend is used
+        from google.cloud import language
+        self.language = language
+        self.client = language.LanguageServiceClient()
+        self.interval = 1.0 / rate
+        self.last_call = 0.0
+
+    def score(self, text):
+        wait = self.last_call + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.last_call = time.monotonic()
+        document = self.language.Document(
+            content=text,
+            type_=self.language.Document.Type.PLAIN_TEXT,
+        )
+        response = self.client.analyze_sentiment(
+            document=document,
+            encoding_type='UTF32',
+        )
+        sentiment = response.document_sentiment
+        return sentiment.score, sentiment.magnitude
+
+
+class AsyncBackend(SentimentBackend):
+    ''' Base class for remote backends scored with asyncio
+
+    Subclasses implement the request(text) coroutine. Up to window texts
+    are queued ahead, with at most concurrency requests in flight and rate
+    requests per second. Scores are yielded in order as soon as they are
+    ready, so the sentiment cache checkpoints progress as it goes.
+
+    Every iter_scores() call runs on its own event loop; clients bound to
+    a loop are created in open() and released in close() on that loop.
+    '''
+
+    def __init__(self, rate, concurrency=CONCURRENCY, window=CHECKPOINT_EVERY):
+        self.rate = rate
+        self.concurrency = concurrency
+        self.window = window
+
+    async def request(self, text):
+        raise NotImplementedError
+
+    async def open(self):
+        ''' Called on the event loop before the first request'''
+        pass
+
+    async def close(self):
+        ''' Called on the event loop after the last request'''
+        pass
+
+    def score(self, text):
+        return self.score_many([text])[0]
+
+    def iter_scores(self, texts):
+        texts = iter(texts)
+        pending = collections.deque()
+        loop = asyncio.new_event_loop()
+        opened = False
+        try:
+            loop.run_until_complete(self.open())
+            opened = True
+            scorer = loop.run_until_complete(self._scorer())
+            done = 0
+            start = time.monotonic()
+            while True:
+                # Keep up to window requests queued ahead of the oldest one
+                for text in itertools.islice(texts, self.window - len(pending)):
+                    pending.append(loop.create_task(scorer.score(text)))
+                if not pending:
+                    break
+                # Running the loop for the oldest task advances all of them
+                yield loop.run_until_complete(pending.popleft())
+                done += 1
+                if done % self.window == 0:
+                    logging.info('%s: scored %d texts (%.1f texts/s)',
+                                 self.name, done,
+                                 done / (time.monotonic() - start))
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending,
+                                                       return_exceptions=True))
+            if opened:
+                loop.run_until_complete(self.close())
+            loop.close()
+
+    async def _scorer(self):
+        # Event loop primitives must be created inside the loop
+        return AsyncScorer(self.request, self.rate, self.concurrency)
+
+
+class AsyncGoogleBackend(AsyncBackend):
+    ''' Google Cloud Natural Language API with concurrent requests
+
+    Scores are identical to GoogleBackend, so both share the cache name.
+    '''
+
+    name = 'google'
+
+    def __init__(self, rate=GOOGLE_RATE, concurrency=CONCURRENCY):
+        # Optional dependency: only needed when this backend is used
+        from google.api_core import exceptions
+        from google.cloud import language
+        super().__init__(rate, concurrency)
+        self.language = language
+        self.retryable = (exceptions.TooManyRequests,
+                          exceptions.ServiceUnavailable,
+                          exceptions.InternalServerError,
+                          exceptions.DeadlineExceeded)
+        self.client = None
+
+    async def open(self):
+        # The gRPC aio channel is bound to the running loop
+        self.client = self.language.LanguageServiceAsyncClient()
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.transport.close()
+            self.client = None
+
+    async def request(self, text):
+        document = self.language.Document(
+            content=text,
+            type_=self.language.Document.Type.PLAIN_TEXT,
+        )
+        try:
+            response = await self.client.analyze_sentiment(
+                document=document,
+                encoding_type='UTF32',
+            )
+        except self.retryable as e:
+            raise RetryableError(str(e))
+        sentiment = response.document_sentiment
+        return sentiment.score, sentiment.magnitude
+
+
+class HttpBackend(AsyncBackend):
+    ''' JSON scoring service: POST {"text": ...} -> {"score", "magnitude"}'''
+
+    name = 'http'
+
+    def __init__(self, url=None, rate=GOOGLE_RATE, concurrency=CONCURRENCY):
+        super().__init__(rate, concurrency)
+        self.url = urlsplit(url or os.environ.get('SENTIMENT_URL', SENTIMENT_URL))
+
+    async def request(self, text):
+        body = json.dumps({'text': text}).encode('utf-8')
+        reader, writer = await asyncio.open_connection(self.url.hostname,
+                                                       self.url.port or 80)
+        try:
+            writer.write(('POST %s HTTP/1.1\r\n'
+                          'Host: %s\r\n'
+                          'Content-Type: application/json\r\n'
+                          'Content-Length: %d\r\n'
+                          'Connection: close\r\n\r\n'
+                          % (self.url.path or '/', self.url.netloc, len(body))
+                          ).encode('ascii') + body)
+            await writer.drain()
+            response = await reader.read()
+        finally:
+            writer.close()
+        head, _, payload = response.partition(b'\r\n\r\n')
+        status = int(head.split(None, 2)[1])
+        if status == 429 or status >= 500:
+            raise RetryableError('HTTP %d' % status)
+        if status != 200:
+            raise ValueError('HTTP %d from %s' % (status, self.url.geturl()))
+        result = json.loads(payload)
+        return result['score'], result['magnitude']
+
+
+# Backends by name
+BACKENDS = {
+    'google': GoogleBackend,
+    'google-async': AsyncGoogleBackend,
+    'http': HttpBackend,
+    'vader': VaderBackend,
+    'stub': StubBackend,
+}
+
+
+def get_backend(default, **kwargs):
+    ''' Create the backend named by $SENTIMENT_BACKEND, else by default'''
+    name = os.environ.get('SENTIMENT_BACKEND', default)
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError('Unknown sentiment backend %r (expected one of %s)'
+                         % (name, ', '.join(sorted(BACKENDS))))
+    return backend(**kwargs)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent Sentiment Cache
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Sentiment results are stored in SQLite, keyed by the sentiment backend and a
+SHA-1 hash of the cleaned text. Retweets repeat the same text many times, so
+each batch is deduplicated first and only texts missing from the cache are
+sent to the backend. Re-running an analysis with new thresholds or plots
+then needs no backend calls at all.
+"""
+
+# Imports
+import hashlib
+import logging
+import sqlite3
+import time
+
+# Hashes per SELECT (SQLite allows 999 parameters)
+LOOKUP_BATCH = 500
+# Backend results written per commit, so an interrupted run keeps its work
+COMMIT_EVERY = 100
+
+
+def text_hash(text):
+    ''' Return the cache key of a cleaned text'''
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class SentimentCache(object):
+    ''' (backend, text hash) -> (score, magnitude) table in SQLite'''
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS sentiment ('
+            'backend TEXT NOT NULL, '
+            'text_hash TEXT NOT NULL, '
+            'score REAL, '
+            'magnitude REAL, '
+            'PRIMARY KEY (backend, text_hash)) WITHOUT ROWID')
+        self.connection.commit()
+
+    def lookup(self, backend, hashes):
+        ''' Return {text hash: (score, magnitude)} cached for a backend name'''
+        hashes = list(hashes)
+        found = dict()
+        for i in range(0, len(hashes), LOOKUP_BATCH):
+            batch = hashes[i:i + LOOKUP_BATCH]
+            rows = self.connection.execute(
+                'SELECT text_hash, score, magnitude FROM sentiment '
+                'WHERE backend = ? AND text_hash IN (%s)'
+                % ','.join('?' * len(batch)), [backend] + batch)
+            for key, score, magnitude in rows:
+                found[key] = (score, magnitude)
+        return found
+
+    def store(self, backend, results):
+        ''' Save {text hash: (score, magnitude)} results of a backend name'''
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO sentiment VALUES (?, ?, ?, ?)',
+            [(backend, key, score, magnitude)
+             for key, (score, magnitude) in results.items()])
+        self.connection.commit()
+
+    def score_many(self, backend, texts):
+        ''' Return (score, magnitude) for every text, in order
+
+        Only distinct texts not yet cached for backend.name are passed to
+        backend.iter_scores().
+        '''
+        texts = list(texts)
+        keys = [text_hash(text) for text in texts]
+        unique = dict(zip(keys, texts))
+        results = self.lookup(backend.name, unique)
+        misses = [key for key in unique if key not in results]
+        logging.info('Sentiment cache (%s): %d texts, %d distinct, %d cached, '
+                     '%d to score', backend.name, len(texts), len(unique),
+                     len(results), len(misses))
+        start = time.perf_counter()
+        pending = dict()
+        scores = backend.iter_scores(unique[key] for key in misses)
+        for key, result in zip(misses, scores):
+            pending[key] = result
+            if len(pending) == COMMIT_EVERY:
+                self.store(backend.name, pending)
+                results.update(pending)
+                pending = dict()
+        self.store(backend.name, pending)
+        results.update(pending)
+        if misses:
+            elapsed = time.perf_counter() - start
+            logging.info('Scored %d texts with %s in %.1f s (%.1f texts/s)',
+                         len(misses), backend.name, elapsed,
+                         len(misses) / elapsed)
+        return [results[key] for key in keys]
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming Sketches for Huge-Cardinality Tallies
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+TallySketch counts items (locations, hashtags, ...) in memory that does not
+grow with the number of distinct items:
+
+    HyperLogLog     distinct items, relative standard error `error`
+    CountMinSketch  per-item counts, over by at most epsilon * total with
+                    probability 1 - delta
+    heavy hitters   the items with the largest count-min estimates, kept
+                    as a bounded candidate set
+
+Items are buffered and folded into the sketches one batch at a time, so a
+repeated item is hashed once per batch. Hashes are stable across processes,
+so partial sketches from ScanEngine workers merge exactly.
+"""
+
+# Imports
+import hashlib
+import heapq
+import math
+from collections import Counter
+
+import numpy as np
+
+# Relative standard error of distinct counts
+HLL_ERROR = 0.01
+# Count-min overestimate bound, as a fraction of all items counted
+CMS_EPSILON = 1e-4
+# Probability that an estimate exceeds the bound
+CMS_DELTA = 0.01
+# Items buffered before they are folded into the sketches
+BATCH = 100000
+
+
+def item_hash(item):
+    ''' Return a stable 64-bit hash of a string'''
+    return int.from_bytes(hashlib.blake2b(item.encode('utf-8'),
+                                          digest_size=8).digest(), 'little')
+
+
+class HyperLogLog(object):
+    ''' Distinct count estimate from 2^p one-byte registers'''
+
+    def __init__(self, error=HLL_ERROR):
+        self.p = min(max(math.ceil(2 * math.log2(1.04 / error)), 4), 18)
+        self.registers = np.zeros(1 << self.p, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        ''' Add items by their item_hash() values'''
+        bits = 64 - self.p
+        mask = (1 << bits) - 1
+        index = [h >> bits for h in hashes]
+        # Position of the leftmost 1 in the remaining bits
+        rank = [bits - (h & mask).bit_length() + 1 for h in hashes]
+        np.maximum.at(self.registers, np.array(index, dtype=np.int64),
+                      np.array(rank, dtype=np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        ''' Return the estimated number of distinct items'''
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small range: linear counting
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class CountMinSketch(object):
+    ''' depth x width counter table; estimates never undercount'''
+
+    def __init__(self, epsilon=CMS_EPSILON, delta=CMS_DELTA):
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+
+    def _columns(self, hashes):
+        ''' Return the depth x len(hashes) table columns of hashed items'''
+        hashes = np.array(hashes, dtype=np.uint64).reshape(1, -1)
+        # Double hashing: row i uses a + i * b
+        a = hashes & np.uint64(0xFFFFFFFF)
+        b = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64).reshape(-1, 1)
+        return ((a + rows * b) % np.uint64(self.width)).astype(np.int64)
+
+    def add_hashes(self, hashes, counts):
+        ''' Add counts of items by their item_hash() values'''
+        columns = self._columns(hashes)
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[row], weights=counts,
+                                           minlength=self.width).astype(np.int64)
+
+    def estimate_hashes(self, hashes):
+        ''' Return the count estimates of items by their item_hash() values'''
+        columns = self._columns(hashes)
+        return self.table[np.arange(self.depth).reshape(-1, 1), columns].min(axis=0)
+
+    def merge(self, other):
+        self.table += other.table
+
+
+class TallySketch(object):
+    ''' Bounded-memory replacement for a Counter of items
+
+    capacity heavy-hitter candidates are kept (twice that between prunes);
+    it should be well above the number of top items reported.
+    '''
+
+    def __init__(self, error=HLL_ERROR, epsilon=CMS_EPSILON, delta=CMS_DELTA,
+                 capacity=1000):
+        self.hll = HyperLogLog(error)
+        self.cms = CountMinSketch(epsilon, delta)
+        self.capacity = capacity
+        self.epsilon = epsilon
+        self.delta = delta
+        self.error = error
+        self.total = 0
+        # Heavy-hitter candidate -> item_hash()
+        self.candidates = dict()
+        self.buffer = []
+
+    def add(self, item):
+        self.buffer.append(item)
+        if len(self.buffer) >= BATCH:
+            self.flush()
+
+    def flush(self):
+        ''' Fold buffered items into the sketches'''
+        if not self.buffer:
+            return
+        batch = Counter(self.buffer)
+        self.buffer = []
+        items = list(batch)
+        hashes = [item_hash(item) for item in items]
+        counts = np.array([batch[item] for item in items], dtype=np.float64)
+        self.total += int(counts.sum())
+        self.hll.add_hashes(hashes)
+        self.cms.add_hashes(hashes, counts)
+        self.candidates.update(zip(items, hashes))
+        if len(self.candidates) > 2 * self.capacity:
+            self._prune()
+
+    def _prune(self):
+        ''' Keep the capacity candidates with the largest estimates'''
+        keep = heapq.nlargest(self.capacity, self.estimates().items(),
+                              key=lambda x: x[1])
+        self.candidates = {item: self.candidates[item] for item, _ in keep}
+
+    def estimates(self):
+        ''' Return {candidate: count estimate}'''
+        items = list(self.candidates)
+        if not items:
+            return dict()
+        counts = self.cms.estimate_hashes([self.candidates[item] for item in items])
+        return dict(zip(items, counts.tolist()))
+
+    def merge(self, other):
+        self.flush()
+        other.flush()
+        self.total += other.total
+        self.hll.merge(other.hll)
+        self.cms.merge(other.cms)
+        self.candidates.update(other.candidates)
+        if len(self.candidates) > 2 * self.capacity:
+            self._prune()
+
+    def top(self, k):
+        ''' Return the k (item, estimate) pairs with the largest estimates'''
+        self.flush()
+        return heapq.nlargest(k, self.estimates().items(), key=lambda x: x[1])
+
+    def distinct(self):
+        ''' Return the estimated number of distinct items'''
+        self.flush()
+        return self.hll.count()
+
+    def nbytes(self):
+        ''' Return the memory held by the sketch tables'''
+        return self.hll.registers.nbytes + self.cms.table.nbytes
+
+    def summary(self, k):
+        ''' Return the sketch results and its error bounds'''
+        return {
+            'total': self.total,
+            'distinct_estimate': self.distinct(),
+            'top': self.top(k),
+            'bounds': {
+                'distinct_relative_error': self.error,
+                'count_overestimate': self.epsilon * self.total,
+                'count_confidence': 1 - self.delta,
+            },
+            'sketch_bytes': self.nbytes(),
+        }
+
+    def observed_error(self, totals, k):
+        ''' Return the error of the sketch against exact totals'''
+        self.flush()
+        exact_top = heapq.nlargest(k, totals.items(), key=lambda x: x[1])
+        sketch_top = {item for item, _ in self.top(k)}
+        items = [item for item, _ in exact_top]
+        estimates = self.cms.estimate_hashes([item_hash(item) for item in items])
+        errors = estimates - np.array([count for _, count in exact_top])
+        distinct = len(totals)
+        return {
+            'distinct': distinct,
+            'distinct_relative_error': (abs(self.distinct() - distinct) / distinct
+                                        if distinct else 0.0),
+            'top_recall': (len(sketch_top.intersection(items)) / len(items)
+                           if items else 1.0),
+            'count_max_overestimate': int(errors.max()) if len(errors) else 0,
+            'count_mean_overestimate': float(errors.mean()) if len(errors) else 0.0,
+        }
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar Parquet Tweet Store
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Each hourly .jsonl.gz shard is flattened once into a Parquet file of a
+hive-partitioned dataset:
+
+    <store_dir>/month=2020-03/date=2020-03-15/coronavirus-tweet-id-2020-03-15-02.parquet
+
+Analyses then read only the columns they need, and month/date filters are
+pushed down to the partition directories.
+"""
+
+# Imports
+import os
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from tweet_tools.flatten import flatten_tweets
+from tweet_tools.scan import read_tweets
+
+# Parquet schema of tweet_df
+TWEET_SCHEMA = pa.schema([
+    ('created_at', pa.timestamp('s', tz='UTC')),
+    ('id', pa.int64()),
+    ('user_id', pa.string()),
+    ('tweet_text', pa.string()),
+    ('hashtags', pa.list_(pa.string())),
+    ('user_followers_count', pa.int64()),
+    ('is_reply', pa.bool_()),
+    ('in_reply_to_status_id', pa.int64()),
+    ('in_reply_to_user_id', pa.int64()),
+    ('in_reply_to_screen_name', pa.string()),
+    ('is_retweet', pa.bool_()),
+    ('retweeted_id', pa.string()),
+    ('retweeted_screen_name', pa.string()),
+    ('has_mentions', pa.bool_()),
+    ('user_mention_id', pa.int64()),
+    ('user_mention_screen_name', pa.string()),
+    ('is_geo', pa.bool_()),
+    ('geo_coordinates', pa.list_(pa.float64())),
+    ('is_profile_loc', pa.bool_()),
+    ('profile_loc', pa.string()),
+    ('user_name', pa.string()),
+])
+
+# Partition columns added from the directory names
+PARTITIONING = ds.partitioning(
+    pa.schema([('month', pa.string()), ('date', pa.string())]),
+    flavor='hive')
+
+
+def shard_table(path):
+    ''' Flatten one .jsonl.gz shard into an Arrow table'''
+    tweet_df = flatten_tweets(read_tweets(path))
+    return pa.Table.from_pandas(tweet_df, schema=TWEET_SCHEMA,
+                                preserve_index=False)
+
+
+def shard_store_path(store_dir, path, day):
+    ''' Return the Parquet path of a shard in the partitioned store'''
+    name = os.path.basename(path).split('.')[0] + '.parquet'
+    return os.path.join(store_dir, 'month=' + day[:7], 'date=' + day, name)
+
+
+def ingest_shard(path, day, store_dir, overwrite=False):
+    ''' Convert one shard into the store and return its number of rows
+
+    Shards already in the store are skipped unless overwrite is set.
+    '''
+    out_path = shard_store_path(store_dir, path, day)
+    if os.path.exists(out_path) and not overwrite:
+        return None
+    table = shard_table(path)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    # Write a hidden file and rename so readers never see partial files
+    tmp_path = os.path.join(os.path.dirname(out_path),
+                            '.' + os.path.basename(out_path))
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, out_path)
+    return table.num_rows
+
+
+def store_days(store_dir):
+    ''' Return the sorted days (YYYY-MM-DD) with Tweets in the store'''
+    days = []
+    for month in sorted(os.listdir(store_dir)):
+        if month.startswith('month='):
+            days.extend(name[len('date='):] for name in
+                        sorted(os.listdir(os.path.join(store_dir, month)))
+                        if name.startswith('date='))
+    return days
+
+
+def tweet_dataset(store_dir):
+    ''' Open the partitioned store as a pyarrow dataset'''
+    return ds.dataset(store_dir, format='parquet', partitioning=PARTITIONING)
+
+
+def load_tweets(store_dir, columns=None, months=None, start=None, end=None):
+    ''' Load tweet_df from the store
+
+    columns limits the columns read; months (list of 'YYYY-MM') and the
+    inclusive start/end days ('YYYY-MM-DD') are pushed down to the
+    partition directories.
+    '''
+    dataset = tweet_dataset(store_dir)
+    condition = None
+    for expression in (
+            ds.field('month').isin(months) if months else None,
+            ds.field('date') >= start if start else None,
+            ds.field('date') <= end if end else None):
+        if expression is not None:
+            condition = expression if condition is None else condition & expression
+    table = dataset.to_table(columns=columns, filter=condition)
+    # Keep ids exact: nullable id columns become Python ints and None
+    return table.to_pandas(integer_object_nulls=True)
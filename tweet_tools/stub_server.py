@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Stub Sentiment Server
+Megan M. Parsons | meganmp [at] bu [dot] edu
+
+Local stand-in for a remote sentiment API, used to exercise HttpBackend and
+the rate limiter without network access or quota. Answers
+POST {"text": ...} with StubBackend scores after a simulated round-trip
+latency, and throttles a fraction of requests with HTTP 429.
+INSTRUCTIONS: python -m tweet_tools.stub_server [--port 8080] [--latency 0.2]
+"""
+
+# Imports
+import argparse
+import asyncio
+import json
+import logging
+import random
+
+from tweet_tools.sentiment import StubBackend
+
+
+class StubServer(object):
+    ''' Minimal HTTP/1.1 JSON scoring service on asyncio streams'''
+
+    def __init__(self, latency=0.2, error_rate=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.backend = StubBackend()
+        self.requests = 0
+
+    async def handle(self, reader, writer):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            for line in head.decode('latin-1').split('\r\n')[1:]:
+                name, _, value = line.partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value)
+            body = await reader.readexactly(length)
+            self.requests += 1
+            await asyncio.sleep(self.latency)
+            if random.random() < self.error_rate:
+                status, payload = '429 Too Many Requests', {'error': 'throttled'}
+            else:
+                score, magnitude = self.backend.score(json.loads(body)['text'])
+                status, payload = '200 OK', {'score': score,
+                                             'magnitude': magnitude}
+            data = json.dumps(payload).encode('utf-8')
+            writer.write(('HTTP/1.1 %s\r\n'
+                          'Content-Type: application/json\r\n'
+                          'Content-Length: %d\r\n'
+                          'Connection: close\r\n\r\n' % (status, len(data))
+                          ).encode('ascii') + data)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ValueError, KeyError) as e:
+            logging.warning('Bad request: %s', e)
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8080):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.2,
+                        help='seconds per request (default: %(default)s)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of requests answered with HTTP 429')
+    args = parser.parse_args()
+    server = StubServer(args.latency, args.error_rate)
+    asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()